@@ -20,6 +20,7 @@ def register():
     panels.register()
 
 def unregister():
+    utils.flush_save()
     panels.unregister()
     operators.unregister()
     utils.unregister()
@@ -0,0 +1,222 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Batch apply engine: adds presets to objects through obj.modifiers.new()
+# instead of bpy.ops, so applying to a selection costs no operator dispatch
+# or context overrides per object. Callers own the undo step.
+import bpy
+import json
+from collections import namedtuple
+from contextlib import contextmanager
+from . import utils
+
+# Objects whose modifiers were written inside batched_updates, by pointer.
+# 'depth' counts nested batches, only the outermost one sends the tags.
+_update_batch = {
+    'depth': 0,
+    'objects': {},
+}
+
+# (asset library, relative identifier) -> name of the node group in
+# bpy.data it was added as. Names, not IDs, so undo and file loads can't
+# leave dangling references; every hit is checked against the group.
+_node_groups = {}
+
+# A preset that is not in the ModSet collection (a stack member, or a bank
+# entry applied from the command line), with the attributes of a ModSet item
+PresetEntry = namedtuple('PresetEntry', [attr for attr, _ in utils.ITEM_FIELDS])
+
+def target_objects(context, use_selected):
+    """Objects a preset button applies to: the active object, or the whole selection"""
+    if use_selected:
+        objects = list(context.selected_objects)
+        if context.object and context.object not in objects:
+            objects.insert(0, context.object)
+        return objects
+    return [context.object] if context.object else []
+
+@contextmanager
+def batched_updates():
+    """Send one update_tag() per object for all modifier writes in the block.
+
+    Parameter writes through ID properties (geometry nodes inputs) don't tag
+    the object themselves, so restore() queues the object with tag_update and
+    the tags go out when the outermost batch ends.
+    """
+    batch = _update_batch
+    batch['depth'] += 1
+    try:
+        yield
+    finally:
+        batch['depth'] -= 1
+        if batch['depth'] == 0:
+            objects = list(batch['objects'].values())
+            batch['objects'].clear()
+            for obj in objects:
+                try:
+                    obj.update_tag()
+                except ReferenceError:
+                    pass
+
+def tag_update(obj):
+    """Tag obj for evaluation, once per batch while batched_updates is open"""
+    if _update_batch['depth']:
+        _update_batch['objects'].setdefault(obj.as_pointer(), obj)
+    else:
+        obj.update_tag()
+
+def parse_parameters(preset):
+    """(key, params) of the saved parameters of a preset, see utils.get_parameters"""
+    return utils.get_parameters(preset.parameters)
+
+def _reuse_key(library, identifier):
+    # Presets saved on Windows use backslashes in the identifier
+    return library, identifier.replace('\\', '/')
+
+def _node_group_key(node_group):
+    asset = utils.resolve_node_group_asset(node_group)
+    return _reuse_key(*asset) if asset is not None else None
+
+def remember_node_group(preset, node_group):
+    _node_groups[_reuse_key(preset.aseetlib, preset.modpath)] = node_group.name
+
+def find_node_group(preset):
+    """Node group of a geometry nodes preset already in bpy.data, or None"""
+    key = _reuse_key(preset.aseetlib, preset.modpath)
+    name = _node_groups.get(key)
+    if name is not None:
+        node_group = bpy.data.node_groups.get(name)
+        if node_group is not None and _node_group_key(node_group) == key:
+            return node_group
+        del _node_groups[key]
+    # Groups appended before this session, or renamed since
+    for node_group in bpy.data.node_groups:
+        group_key = _node_group_key(node_group)
+        if group_key is not None:
+            _node_groups.setdefault(group_key, node_group.name)
+    name = _node_groups.get(key)
+    return bpy.data.node_groups.get(name) if name is not None else None
+
+def _add_node_group_modifier(context, obj, preset):
+    """Add a geometry nodes preset the way the asset browser does, returns the modifier"""
+    if preset.aseetlib == '':
+        lib_type, lib_id = 'ESSENTIALS', ''
+    else:
+        lib_type, lib_id = 'CUSTOM', preset.aseetlib
+    count = len(obj.modifiers)
+    with context.temp_override(object=obj, active_object=obj):
+        bpy.ops.object.modifier_add_node_group(
+            'EXEC_DEFAULT',
+            asset_library_type=lib_type,
+            asset_library_identifier=lib_id,
+            relative_asset_identifier=preset.modpath
+        )
+    if len(obj.modifiers) == count:
+        return None
+    return obj.modifiers.active
+
+def add_modifier(obj, preset, node_group=None):
+    """Create the modifier of a preset on obj with RNA only.
+
+    Geometry nodes presets need the node group that was already resolved
+    for the batch. Returns None when the object type can't hold it.
+    """
+    # The #tags of a preset name are for the panel, not the modifier stack
+    name = utils.split_tags(preset.modname)[0]
+    if preset.modpath != '':
+        if node_group is None:
+            return None
+        mod = obj.modifiers.new(name=name or node_group.name, type='NODES')
+        if mod is not None:
+            mod.node_group = node_group
+        return mod
+    return obj.modifiers.new(name=name or preset.modtype, type=preset.modtype)
+
+def restore(mod, preset, params, key=None):
+    if preset.modpath == '':
+        # Runs even for empty params, which still need their default fixups
+        utils.restore_parameters(mod, params, key=key)
+    elif params:
+        utils.restore_geometry_nodes_parameters(mod, params)
+    tag_update(mod.id_data)
+
+def preset_from_entry(entry):
+    """PresetEntry for a bank entry dict (see utils.preset_to_dict)"""
+    values = []
+    for _, field in utils.ITEM_FIELDS:
+        value = entry.get(field, "")
+        if field == "Parameters" and not isinstance(value, str):
+            value = json.dumps(utils.thaw(value), separators=(',', ':'), ensure_ascii=False)
+        values.append(value)
+    return PresetEntry(*values)
+
+def stack_members(preset):
+    """The modifiers of a stack preset as PresetEntry, in stack order"""
+    key, params = parse_parameters(preset)
+    return [preset_from_entry(entry) for entry in params.get("Stack", ())]
+
+def apply_stack(context, objects, preset):
+    """Add every modifier of a stack preset to each object, returns the new modifiers.
+
+    The modifiers are added hidden in the viewport, so adding and filling
+    them in doesn't evaluate the objects over and over. Visibility is turned
+    back on once everything is in place, and each object evaluates one time.
+    """
+    added = []
+    with batched_updates():
+        # Member by member keeps each object's stack in order and lets every
+        # geometry nodes member bring its asset in once for all objects
+        for member in stack_members(preset):
+            added.extend(apply_preset(context, objects, member, hidden=True))
+        for mod in added:
+            mod.show_viewport = True
+    return added
+
+def apply_preset(context, objects, preset, hidden=False):
+    """Add preset to every object in objects, returns the new modifiers.
+
+    The parameters come from the shared parse cache, so a preset is decoded
+    once however often it is applied. Geometry nodes presets reuse their
+    node group when it is already in bpy.data. Otherwise the asset is added
+    through the asset operator on the first object only, and every other
+    object reuses the node group it brought in. With hidden the new modifiers
+    stay hidden in the viewport. Each object is tagged for evaluation once,
+    after all its parameters are written.
+    """
+    if preset.modtype == utils.STACK_TYPE:
+        return apply_stack(context, objects, preset)
+    key, params = parse_parameters(preset)
+    node_group = find_node_group(preset) if preset.modpath != '' else None
+    added = []
+    with batched_updates():
+        for obj in objects:
+            if obj is None or not hasattr(obj, 'modifiers'):
+                continue
+            try:
+                if preset.modpath != '' and node_group is None:
+                    mod = _add_node_group_modifier(context, obj, preset)
+                    if mod is not None and mod.node_group is not None:
+                        node_group = mod.node_group
+                        remember_node_group(preset, node_group)
+                else:
+                    mod = add_modifier(obj, preset, node_group)
+            except Exception as e:
+                print(f"Modifier addition error ({obj.name}): {str(e)}")
+                continue
+            if mod is None:
+                continue
+            if hidden:
+                mod.show_viewport = False
+            restore(mod, preset, params, key)
+            added.append(mod)
+    return added
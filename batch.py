@@ -0,0 +1,155 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Run a cli.py command over many .blend files with a pool of background
+# Blender processes, and collect the results into one JSON report. This
+# runs with plain Python and must not import bpy:
+#
+#   python batch.py --blender /opt/blender/blender --jobs 16 --report report.json \
+#       shots/ -- apply --preset "Bevel" --objects "Prop_*" --save
+#
+# Every file gets its own Blender process, so a crash or a stuck file only
+# costs that file. Each process is limited to its share of the cores, so
+# throughput grows with the number of jobs up to the core count.
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+CLI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cli.py')
+RESULT_PREFIX = 'MODSET_RESULT '
+# Lines of Blender's output kept in the report for a failed file
+OUTPUT_TAIL = 20
+
+def find_blend_files(paths, recursive=True):
+    """The .blend files in paths, which may be files or folders, sorted"""
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(os.path.abspath(path))
+            continue
+        for root, dirs, names in os.walk(path):
+            files.extend(os.path.abspath(os.path.join(root, name)) for name in names if name.endswith('.blend'))
+            if not recursive:
+                break
+    return sorted(set(files))
+
+def blender_command(args, filepath, command):
+    cmd = [args.blender, '-b']
+    if args.factory_startup:
+        cmd.append('--factory-startup')
+    cmd += [filepath, '--threads', str(args.threads), '--python', CLI_SCRIPT,
+            '--python-exit-code', '1', '--', 'modset'] + command
+    return cmd
+
+def run_file(args, filepath, command):
+    """Run command on one file, returns its report entry"""
+    entry = {"file": filepath, "ok": False, "error": None}
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(blender_command(args, filepath, command), stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, text=True, errors='replace', timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        entry["error"] = f"Timed out after {args.timeout} seconds"
+        entry["seconds"] = time.perf_counter() - start
+        return entry
+    except OSError as e:
+        entry["error"] = f"Could not start Blender: {str(e)}"
+        entry["seconds"] = time.perf_counter() - start
+        return entry
+    entry["seconds"] = time.perf_counter() - start
+    entry["returncode"] = proc.returncode
+    lines = proc.stdout.splitlines()
+    for line in reversed(lines):
+        if line.startswith(RESULT_PREFIX):
+            try:
+                result = json.loads(line[len(RESULT_PREFIX):])
+            except ValueError:
+                break
+            result.pop("file", None)
+            # Time spent inside Blender, next to the wall time of the whole process
+            result["apply_seconds"] = result.pop("seconds", None)
+            entry.update(result)
+            break
+    else:
+        entry["error"] = "Blender exited without a result"
+    if proc.returncode != 0:
+        entry["ok"] = False
+        entry["error"] = entry.get("error") or f"Blender exited with code {proc.returncode}"
+    if not entry["ok"]:
+        entry["output"] = lines[-OUTPUT_TAIL:]
+    return entry
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if '--' not in argv:
+        print("batch.py: give the cli.py command after '--', e.g. -- apply --preset NAME", file=sys.stderr)
+        return 2
+    split = argv.index('--')
+    command = argv[split + 1:]
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(prog='batch')
+    parser.add_argument('paths', nargs='+', help='.blend files or folders holding them')
+    parser.add_argument('--blender', default=os.environ.get('BLENDER', 'blender'), help='Blender executable')
+    parser.add_argument('--jobs', type=int, default=cpu_count, help='Blender processes running at once')
+    parser.add_argument('--threads', type=int, default=0,
+                        help='Threads per Blender process, by default the cores divided by --jobs')
+    parser.add_argument('--timeout', type=float, default=600.0, help='Seconds before a file is given up')
+    parser.add_argument('--no-recursive', dest='recursive', action='store_false')
+    parser.add_argument('--factory-startup', action='store_true',
+                        help='Ignore the user preferences and add-ons of the machine')
+    parser.add_argument('--report', default=None, help='Write the JSON report to this file')
+    args = parser.parse_args(argv[:split])
+    args.jobs = max(1, args.jobs)
+    if args.threads <= 0:
+        args.threads = max(1, cpu_count // args.jobs)
+
+    files = find_blend_files(args.paths, args.recursive)
+    results = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [pool.submit(run_file, args, filepath, command) for filepath in files]
+        for done, future in enumerate(as_completed(futures), 1):
+            entry = future.result()
+            results.append(entry)
+            status = 'ok' if entry["ok"] else f'FAILED: {entry["error"]}'
+            print(f"[{done}/{len(files)}] {entry['file']} ({entry['seconds']:.2f}s) {status}", file=sys.stderr)
+    seconds = time.perf_counter() - start
+
+    results.sort(key=lambda entry: entry["file"])
+    failed = [entry for entry in results if not entry["ok"]]
+    report = {
+        "command": command,
+        "blender": args.blender,
+        "jobs": args.jobs,
+        "threads": args.threads,
+        "files": len(files),
+        "succeeded": len(files) - len(failed),
+        "failed": len(failed),
+        "seconds": seconds,
+        "files_per_second": len(files) / seconds if seconds else None,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Time applying one preset to a selection with the batch engine, against
+# the old one-operator-call-per-object path.
+#
+#   blender -b --factory-startup --python benchmarks/bench_batch_apply.py -- \
+#       --counts 10,100,1000,10000 --output batch_apply.json
+import bpy
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common
+
+def make_preset(modset, mod_type):
+    """Capture a preset from a modifier with a few non-default values"""
+    wm = bpy.context.window_manager
+    obj = common.make_objects(1, name='Template')[0]
+    mod = obj.modifiers.new(name=mod_type.title(), type=mod_type)
+    if mod_type == 'BEVEL':
+        mod.width = 0.05
+        mod.segments = 3
+    item = wm.modset_preset.add()
+    item.modname = mod.name
+    item.modtype = mod_type
+    item.parameters = json.dumps(modset.utils.get_modifier_parameters(mod), separators=(',', ':'))
+    bpy.data.objects.remove(obj, do_unlink=True)
+    return item
+
+def legacy_apply(modset, preset, objects):
+    """One modifier_add call and one json.loads per object, as before the batch engine"""
+    context = bpy.context
+    for obj in objects:
+        with context.temp_override(object=obj, active_object=obj):
+            bpy.ops.object.modifier_add(type=preset.modtype)
+        params = json.loads(preset.parameters)
+        modset.utils.restore_parameters(obj.modifiers.active, params)
+
+def main():
+    parser = argparse.ArgumentParser(prog='bench_batch_apply')
+    parser.add_argument('--counts', type=common.parse_counts, default=[10, 100, 1000, 10000])
+    parser.add_argument('--type', default='BEVEL', help='Modifier type of the preset')
+    parser.add_argument('--legacy-max', type=int, default=1000,
+                        help='Skip the per-object operator path above this many objects')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args(common.script_args())
+
+    modset = common.load_addon()
+    engine = sys.modules[common.ADDON_NAME + '.apply']
+
+    results = {"benchmark": "batch_apply", "preset_type": args.type, "runs": [], **common.blender_info()}
+    for count in args.counts:
+        common.clear_scene()
+        bpy.context.window_manager.modset_preset.clear()
+        preset = make_preset(modset, args.type)
+        objects = common.make_objects(count)
+        run = {"objects": count}
+        with common.Timer() as t:
+            engine.apply_preset(bpy.context, objects, preset)
+        run["batch_seconds"] = t.seconds
+        run["batch_us_per_object"] = t.seconds / count * 1e6
+        if count <= args.legacy_max:
+            for obj in objects:
+                obj.modifiers.clear()
+            with common.Timer() as t:
+                legacy_apply(modset, preset, objects)
+            run["legacy_seconds"] = t.seconds
+            run["legacy_us_per_object"] = t.seconds / count * 1e6
+        results["runs"].append(run)
+        print(f"{count:>6} objects: {run}")
+    common.write_results(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare the size and load time of a bank in each snapshot format:
+#   legacy        prefs.json as the add-on used to write it (indent=4)
+#   json          compact JSON snapshot
+#   binary        container.py records, uncompressed (the default)
+#   binary_zlib   container.py records, zlib compressed
+# store.py and container.py don't need Blender, so this runs with plain Python:
+#
+#   python benchmarks/bench_container.py --counts 100,1000,10000 --output container.json
+#
+# --shared gives that share of the presets the parameters of an earlier
+# one, as libraries of renamed or re-tagged variants have. The binary
+# formats store those parameters only once.
+import os
+import sys
+import json
+import time
+import types
+import random
+import argparse
+import tempfile
+import importlib
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_store():
+    """Import store.py without the add-on's __init__, which needs bpy"""
+    package = types.ModuleType('modset')
+    package.__path__ = [ADDON_DIR]
+    sys.modules.setdefault('modset', package)
+    return importlib.import_module('modset.store')
+
+def synthetic_entries(count, seed=0, shared=0.0):
+    """Entries mixing small modifier presets and geometry nodes presets with array inputs.
+
+    A shared fraction of them copy the parameters of an earlier entry of the same kind.
+    """
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        if i >= 4 and rng.random() < shared:
+            entry = dict(entries[i - 4 * rng.randint(1, i // 4)])
+            entry["Name"] = f"{entry['Name'].split()[0]} {i}"
+            entries.append(entry)
+            continue
+        if i % 4 == 3:
+            params = {f"Socket_{k}": [round(rng.uniform(-10, 10), 4) for _ in range(64)] for k in range(4)}
+            params["Input_Name"] = f"Collection {i}"
+            entry = {"Name": f"Scatter {i}", "Type": "NODES", "Icon": "GEOMETRY_NODES",
+                     "Path": "Scatter/Scatter on Surface", "AssetLibrary": "Studio"}
+        else:
+            params = {"count": rng.randint(1, 20), "relative_offset_displace": [1.0, 0.0, 0.0],
+                      "use_merge_vertices": bool(i % 2), "merge_threshold": 0.01, "fit_type": "FIXED_COUNT"}
+            entry = {"Name": f"Array {i}", "Type": "ARRAY", "Icon": "MOD_ARRAY", "Path": "", "AssetLibrary": ""}
+        entry["Parameters"] = json.dumps(params, separators=(',', ':'))
+        entries.append(entry)
+    return entries
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+def bench_count(store, directory, count, repeat, shared=0.0):
+    preference = {"column_number": 3, "show_mod_icon": True, "show_mod_name": True, "show_preset": False}
+    preset = {"Preference": preference, "ModSet": synthetic_entries(count, shared=shared)}
+    results = {}
+
+    legacy_path = os.path.join(directory, f'legacy_{count}.json')
+    with open(legacy_path, 'w', encoding='utf-8') as f:
+        json.dump([{"Preset1": preset}], f, indent=4, ensure_ascii=False)
+    formats = [('legacy', legacy_path)]
+    default = store.COMPRESS_SNAPSHOTS
+    for name, extension, compress in (('json', '.json', False), ('binary', '.msb', False),
+                                      ('binary_zlib', '.msb', True)):
+        path = os.path.join(directory, f'{name}_{count}{extension}')
+        store.COMPRESS_SNAPSHOTS = compress
+        store.write_snapshot('Preset1', preset, path)
+        formats.append((name, path))
+    store.COMPRESS_SNAPSHOTS = default
+
+    expected = [store.entry_values(e) for e in preset["ModSet"]]
+    for name, path in formats:
+        loaded = store.load_preset('Preset1', path)
+        if [store.entry_values(e) for e in loaded["ModSet"]] != expected:
+            raise RuntimeError(f"{name} did not load back what was written")
+        results[f'{name}/presets={count}'] = {
+            "bytes": os.path.getsize(path),
+            "load_seconds": best_of(repeat, lambda: store.load_preset('Preset1', path)),
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(prog='bench_container')
+    parser.add_argument('--counts', type=lambda t: [int(v) for v in t.split(',') if v.strip()],
+                        default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5, help='Keep the best of this many runs')
+    parser.add_argument('--shared', type=float, default=0.0,
+                        help='Share of presets repeating the parameters of another, 0 to 1')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    store = load_store()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='modset_container_') as directory:
+        for count in args.counts:
+            results.update(bench_count(store, directory, count, args.repeat, args.shared))
+            print(f"{count:>6} presets done", file=sys.stderr)
+    output = {
+        "benchmark": "container",
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "repeat": args.repeat,
+        "shared": args.shared,
+        "results": results,
+    }
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
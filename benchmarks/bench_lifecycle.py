@@ -0,0 +1,170 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Time the preset lifecycle operators against synthetic libraries and
+# selections. Everything is generated, so it runs on a CPU-only box:
+#
+#   blender -b --factory-startup --python benchmarks/bench_lifecycle.py -- \
+#       --output current.json [--baseline previous.json --max-regression 10]
+#
+# With --baseline the script exits with code 1 when a timing is more than
+# --max-regression percent slower than in the baseline file.
+import bpy
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common
+
+PREFERENCE = {"column_number": 3, "show_mod_icon": True, "show_mod_name": True, "show_preset": False}
+
+def write_bank(modset, entries):
+    store = modset.store
+    store.save_bank(store.DEFAULT_BANK, {"Preference": PREFERENCE, "ModSet": entries})
+
+def load_library(modset, entries):
+    """Write entries as the default bank and load them into the session library"""
+    write_bank(modset, entries)
+    bpy.ops.modset.load_preset()
+
+def forget_library(modset):
+    """Empty the session library so the next load reads and builds the bank again"""
+    utils = modset.utils
+    with utils.muted_changes():
+        bpy.context.window_manager.modset_preset.clear()
+    utils.mark_synced(False)
+
+def bench_load_preset(modset, entries, repeat):
+    """(cold, cached) load times: into an empty library, and with the bank files unchanged"""
+    write_bank(modset, entries)
+    cold = common.best_of(repeat, lambda: bpy.ops.modset.load_preset(), setup=lambda: forget_library(modset))
+    bpy.ops.modset.load_preset()
+    cached = common.best_of(repeat, lambda: bpy.ops.modset.load_preset())
+    return cold, cached
+
+def bench_autosave(modset, repeat):
+    """Full snapshot: the operator plus the write the save scheduler would do"""
+    def run():
+        bpy.ops.modset.autosave()
+        modset.utils.flush_save()
+    return common.best_of(repeat, run)
+
+def bench_add_selected(modset, template, calls):
+    """Mean time of one Add Selected, including its share of the flush"""
+    view_layer = bpy.context.view_layer
+    view_layer.objects.active = template
+    mods = list(template.modifiers)
+    with common.Timer() as t:
+        for i in range(calls):
+            template.modifiers.active = mods[i % len(mods)]
+            bpy.ops.modset.add_selected()
+        modset.utils.flush_save()
+    return t.seconds / calls
+
+def bench_user_button(index, objects, repeat):
+    """Apply preset index to every object in objects"""
+    def run():
+        for obj in objects:
+            obj.modifiers.clear()
+        bpy.ops.modset.user_button(collection_index=index, use_selected=True)
+    return common.best_of(repeat, run)
+
+def bench_apply_all(count):
+    obj = common.make_objects(1, name='ApplyAll')[0]
+    bpy.context.view_layer.objects.active = obj
+    with common.Timer() as t:
+        bpy.ops.modset.debug_apply_all_modifiers()
+    bpy.data.objects.remove(obj, do_unlink=True)
+    return t.seconds
+
+def select_only(objects):
+    for obj in bpy.context.view_layer.objects:
+        obj.select_set(False)
+    for obj in objects:
+        obj.select_set(True)
+    if objects:
+        bpy.context.view_layer.objects.active = objects[0]
+
+def main():
+    parser = argparse.ArgumentParser(prog='bench_lifecycle')
+    parser.add_argument('--presets', type=common.parse_counts, default=[10, 100, 1000, 10000])
+    parser.add_argument('--objects', type=common.parse_counts, default=[1, 10, 100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3, help='Keep the best of this many runs')
+    parser.add_argument('--add-calls', type=int, default=20, help='Add Selected calls per library size')
+    parser.add_argument('--apply-all-max', type=int, default=None,
+                        help='Skip Debug Apply All above this many presets, by default none are skipped')
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--baseline', default=None, help='Results file to compare against')
+    parser.add_argument('--max-regression', type=float, default=10.0,
+                        help='Allowed slowdown against the baseline, in percent')
+    args = parser.parse_args(common.script_args())
+    if args.apply_all_max is None:
+        args.apply_all_max = max(args.presets, default=0)
+
+    modset = common.load_addon()
+    common.clear_scene()
+    templates = common.make_templates(modset)
+    types = sorted({mod.type for obj in templates for mod in obj.modifiers})
+    results = {}
+
+    for count in args.presets:
+        entries = common.synthetic_entries(modset, templates, count)
+        cold, cached = bench_load_preset(modset, entries, args.repeat)
+        results[f'load_preset/presets={count}'] = cold
+        results[f'load_preset_cached/presets={count}'] = cached
+        load_library(modset, entries)
+        results[f'autosave/presets={count}'] = bench_autosave(modset, args.repeat)
+        results[f'add_selected/presets={count}'] = bench_add_selected(modset, templates[0], args.add_calls)
+        load_library(modset, entries)
+        targets = common.make_objects(1, name='Target')
+        select_only(targets)
+        results[f'user_button/presets={count}'] = bench_user_button(count - 1, targets, args.repeat)
+        bpy.data.objects.remove(targets[0], do_unlink=True)
+        if count <= args.apply_all_max:
+            results[f'debug_apply_all/presets={count}'] = bench_apply_all(count)
+        print(f"{count:>6} presets done")
+
+    entries = common.synthetic_entries(modset, templates, len(types))
+    load_library(modset, entries)
+    for count in args.objects:
+        targets = common.make_objects(count, name='Target')
+        select_only(targets)
+        results[f'user_button/objects={count}'] = bench_user_button(0, targets, args.repeat)
+        for obj in targets:
+            bpy.data.objects.remove(obj, do_unlink=True)
+        print(f"{count:>6} objects done")
+
+    output = {
+        "benchmark": "lifecycle",
+        **common.blender_info(),
+        "modifier_types": types,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    failures = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get("results", {})
+        failures = common.compare(results, baseline, args.max_regression)
+        output["baseline"] = args.baseline
+        output["max_regression_percent"] = args.max_regression
+        output["regressions"] = failures
+    common.write_results(output, args.output)
+    if failures:
+        print(f"{len(failures)} timings regressed by more than {args.max_regression}%")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
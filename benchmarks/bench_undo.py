@@ -0,0 +1,171 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Measure what a session of panel clicks costs the undo stack on a heavy
+# scene. Operators are called with undo=True, so each one pushes an undo
+# step exactly when a click in the UI would. Global undo needs a window,
+# so this runs with the UI and quits when it is done:
+#
+#   blender --factory-startup --python benchmarks/bench_undo.py -- --output undo.json
+#   blender --factory-startup --python benchmarks/bench_undo.py -- --legacy --output undo_legacy.json
+#
+# --legacy registers every ModSet operator with UNDO again, as they all
+# were before, to get the "before" numbers from the same checkout. The
+# undo steps are counted by undoing back to a marker afterwards.
+import bpy
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import common
+
+# One round of clicks: open the panel, enter setting mode, pick a button,
+# apply it, capture the active modifier, and close everything again
+ACTIONS = (
+    ('expand_panel', {}),
+    ('toggle_setting', {}),
+    ('set_active_button', {'collection_index': 0}),
+    ('user_button', {'collection_index': 0}),
+    ('add_selected', {}),
+    ('toggle_setting', {}),
+    ('expand_panel', {}),
+)
+
+def resident_bytes():
+    """Resident memory of this process, None where it can't be read"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return usage if sys.platform == 'darwin' else usage * 1024
+    except ImportError:
+        return None
+
+# Scene property set to 0 and then 1 in the two undo steps before the clicks
+MARKER = 'bench_undo_marker'
+
+def push_marker(value, message):
+    bpy.context.scene[MARKER] = value
+    bpy.ops.ed.undo_push(message=message)
+
+def count_undo_steps(limit):
+    """Undo until the step before the marker shows up, returns the steps the clicks pushed"""
+    undone = 0
+    with bpy.context.temp_override(window=bpy.context.window_manager.windows[0]):
+        while undone <= limit:
+            try:
+                if bpy.ops.ed.undo() != {'FINISHED'}:
+                    break
+            except RuntimeError:
+                break
+            undone += 1
+            # The scene is a new datablock after every undo, look it up again
+            if bpy.context.scene.get(MARKER) == 0:
+                return undone - 1
+    raise RuntimeError(f"Did not find the start of the benchmark within {undone} undo steps")
+
+def operator_classes(modset):
+    operators = sys.modules[common.ADDON_NAME + '.operators']
+    return [cls for cls in operators.classes if issubclass(cls, bpy.types.Operator)]
+
+def register_legacy(modset):
+    """Re-register every ModSet operator with REGISTER and UNDO"""
+    for cls in operator_classes(modset):
+        bpy.utils.unregister_class(cls)
+        cls.bl_options = {'REGISTER', 'UNDO'}
+        bpy.utils.register_class(cls)
+
+def make_heavy_scene(objects, subdivisions):
+    """objects mesh objects, each with its own subdivided copy of a cube"""
+    import bmesh
+    objs = common.make_objects(objects, name='Heavy')
+    base = objs[0].data
+    bm = bmesh.new()
+    bm.from_mesh(base)
+    for _ in range(subdivisions):
+        bmesh.ops.subdivide_edges(bm, edges=bm.edges[:], cuts=1, use_grid_fill=True)
+    bm.to_mesh(base)
+    bm.free()
+    for obj in objs[1:]:
+        obj.data = base.copy()
+    return objs
+
+def main():
+    parser = argparse.ArgumentParser(prog='bench_undo')
+    parser.add_argument('--objects', type=int, default=200)
+    parser.add_argument('--subdivisions', type=int, default=5, help='Subdivision passes of each mesh')
+    parser.add_argument('--rounds', type=int, default=20, help='Rounds of ACTIONS to run')
+    parser.add_argument('--legacy', action='store_true', help='Give every operator UNDO, as before')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args(common.script_args())
+
+    if bpy.app.background:
+        print("bench_undo needs the global undo stack of a window, run it without -b")
+        bpy.ops.wm.quit_blender()
+        return
+
+    modset = common.load_addon()
+    if args.legacy:
+        register_legacy(modset)
+    common.clear_scene()
+    templates = common.make_templates(modset)
+    modset.store.save_bank(modset.store.DEFAULT_BANK, {
+        "Preference": {"column_number": 3, "show_mod_icon": True, "show_mod_name": True, "show_preset": False},
+        "ModSet": common.synthetic_entries(modset, templates, 50),
+    })
+    heavy = make_heavy_scene(args.objects, args.subdivisions)
+    bpy.context.view_layer.objects.active = heavy[0]
+    heavy[0].modifiers.new(name='Bevel', type='BEVEL')
+    actions = args.rounds * len(ACTIONS)
+    bpy.context.preferences.edit.undo_steps = max(256, actions + 2)
+    push_marker(0, 'bench_undo before')
+    push_marker(1, 'bench_undo start')
+
+    undo_flags = {}
+    for name, _ in ACTIONS:
+        cls = next(c for c in operator_classes(modset) if c.bl_idname == 'modset.' + name)
+        undo_flags[name] = 'UNDO' in cls.bl_options
+    start_bytes = resident_bytes()
+    with common.Timer() as t:
+        for _ in range(args.rounds):
+            for name, props in ACTIONS:
+                getattr(bpy.ops.modset, name)('EXEC_DEFAULT', True, **props)
+    end_bytes = resident_bytes()
+    vertices = len(heavy[0].data.vertices)
+    steps = count_undo_steps(actions + 1)
+
+    results = {
+        "benchmark": "undo",
+        **common.blender_info(),
+        "legacy": args.legacy,
+        "objects": args.objects,
+        "vertices_per_object": vertices,
+        "rounds": args.rounds,
+        "actions_per_round": len(ACTIONS),
+        "operators_with_undo": sorted(name for name, flag in undo_flags.items() if flag),
+        "undo_steps": steps,
+        "seconds": t.seconds,
+        "seconds_per_action": t.seconds / actions,
+        "resident_growth_bytes": (end_bytes - start_bytes) if start_bytes is not None and end_bytes is not None else None,
+    }
+    common.write_results(results, args.output)
+    bpy.ops.wm.quit_blender()
+
+if __name__ == "__main__":
+    bpy.app.timers.register(main, first_interval=0.1)
@@ -0,0 +1,172 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Shared helpers for the headless benchmarks. Scripts in this folder run
+# inside Blender, e.g.
+#   blender -b --factory-startup --python benchmarks/bench_batch_apply.py -- --counts 10,100
+import bpy
+import os
+import sys
+import json
+import time
+import tempfile
+import importlib.util
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_NAME = 'modset'
+
+def script_args():
+    """Arguments given after '--' on the Blender command line"""
+    return sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+
+def parse_counts(text):
+    return [int(v) for v in text.split(',') if v.strip()]
+
+def load_addon(assets_dir=None):
+    """Import and register the add-on from this checkout.
+
+    The preset store is pointed at assets_dir (a new temp folder by default)
+    so benchmarks never touch the real preset banks.
+    """
+    if ADDON_NAME in sys.modules:
+        return sys.modules[ADDON_NAME]
+    spec = importlib.util.spec_from_file_location(
+        ADDON_NAME, os.path.join(ADDON_DIR, '__init__.py'),
+        submodule_search_locations=[ADDON_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_NAME] = module
+    spec.loader.exec_module(module)
+    store = sys.modules[ADDON_NAME + '.store']
+    store.ASSETS_DIR = assets_dir or tempfile.mkdtemp(prefix='modset_bench_')
+    store.PREFS_FILE = os.path.join(store.ASSETS_DIR, 'prefs.json')
+    module.register()
+    return module
+
+def clear_scene():
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+    for volume in list(bpy.data.volumes):
+        bpy.data.volumes.remove(volume)
+
+def make_objects(count, name='Bench'):
+    """Create count selected mesh objects sharing one cube mesh"""
+    import bmesh
+    mesh = bpy.data.meshes.new(name + 'Mesh')
+    bm = bmesh.new()
+    bmesh.ops.create_cube(bm, size=2.0)
+    bm.to_mesh(mesh)
+    bm.free()
+    collection = bpy.context.scene.collection
+    objects = []
+    for i in range(count):
+        obj = bpy.data.objects.new(f'{name}.{i:05d}', mesh)
+        collection.objects.link(obj)
+        objects.append(obj)
+    view_layer = bpy.context.view_layer
+    for obj in objects:
+        obj.select_set(True)
+    if objects:
+        view_layer.objects.active = objects[0]
+    return objects
+
+def make_templates(modset, name='Template'):
+    """Create objects carrying one modifier of every type in utils.MOD_ICONS.
+
+    Each type goes on a mesh object, or on a volume object if a mesh can't
+    hold it. Types neither accepts (Surface, which Blender adds itself)
+    are skipped. The Geometry Nodes modifier gets no node group: Add
+    Selected refuses local groups and presets can't add them back, while
+    an empty one is captured and applied like any other type. Returns the
+    template objects.
+    """
+    mesh_obj = make_objects(1, name=name)[0]
+    volume_obj = bpy.data.objects.new(name + 'Volume', bpy.data.volumes.new(name + 'Volume'))
+    bpy.context.scene.collection.objects.link(volume_obj)
+    templates = [mesh_obj, volume_obj]
+    for mod_type in modset.utils.MOD_ICONS:
+        for obj in templates:
+            try:
+                if obj.modifiers.new(name=mod_type.title(), type=mod_type) is not None:
+                    break
+            except (RuntimeError, TypeError):
+                pass
+    return templates
+
+def synthetic_entries(modset, templates, count):
+    """count bank entries cycling through the modifiers of templates"""
+    utils = modset.utils
+    captured = []
+    for obj in templates:
+        for mod in obj.modifiers:
+            captured.append({
+                "Name": mod.name,
+                "Type": mod.type,
+                "Icon": utils.get_mod_icon(mod.type),
+                "Path": "",
+                "AssetLibrary": "",
+                "Parameters": json.dumps(utils.get_modifier_parameters(mod), separators=(',', ':')),
+            })
+    entries = []
+    for i in range(count):
+        entry = dict(captured[i % len(captured)])
+        entry["Name"] = f'{entry["Name"]} {i}'
+        entries.append(entry)
+    return entries
+
+def best_of(repeat, func, setup=None):
+    """Smallest wall time of repeat calls to func, setup runs untimed before each"""
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+def compare(results, baseline, max_regression):
+    """Return the timings of results that are more than max_regression % slower than baseline"""
+    failures = []
+    for key, seconds in results.items():
+        old = baseline.get(key)
+        if not old or seconds is None:
+            continue
+        change = (seconds - old) / old * 100.0
+        if change > max_regression:
+            failures.append({"key": key, "baseline": old, "current": seconds, "change_percent": change})
+    return failures
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+
+def write_results(results, path=None):
+    text = json.dumps(results, indent=2)
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+def blender_info():
+    return {
+        "blender": bpy.app.version_string,
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+    }
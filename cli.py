@@ -0,0 +1,129 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Command line entry point, for pipelines that stamp presets onto .blend
+# files without the UI:
+#
+#   blender -b shot.blend --python path/to/modset/cli.py -- modset apply \
+#       --preset "Bevel" --objects "Prop_*" --save
+#
+# The outcome is printed as one line starting with RESULT_PREFIX followed
+# by JSON, which batch.py reads. Blender exits with 1 when the preset could
+# not be applied.
+import bpy
+import os
+import sys
+import json
+import time
+import fnmatch
+import argparse
+
+RESULT_PREFIX = 'MODSET_RESULT '
+
+if __package__:
+    from . import store, utils, apply
+
+def script_args(argv=None):
+    """Arguments given after '--' on the Blender command line, without a leading 'modset'"""
+    argv = sys.argv if argv is None else argv
+    args = argv[argv.index('--') + 1:] if '--' in argv else []
+    if args and args[0] == 'modset':
+        args = args[1:]
+    return args
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='modset')
+    commands = parser.add_subparsers(dest='command', required=True)
+    cmd = commands.add_parser('apply', help='Add a preset to the objects of the open file')
+    cmd.add_argument('--preset', required=True, help='Preset name, with or without its #tags')
+    cmd.add_argument('--bank', default=None, help='Bank holding the preset, the active bank by default')
+    cmd.add_argument('--objects', action='append', default=None,
+                     help='Object name pattern (fnmatch), can be given more than once. Default: all objects')
+    cmd.add_argument('--assets', default=None, help='Folder holding the banks folder, instead of the add-on\'s')
+    cmd.add_argument('--save', action='store_true', help='Save the file afterwards')
+    cmd.add_argument('--report', default=None, help='Also write the result JSON to this file')
+    return parser
+
+def find_preset(bank, name):
+    """Bank entry called name, matching the button label when no name is equal"""
+    preset = store.load_bank(bank)
+    if preset is None:
+        raise KeyError(f"Bank '{bank}' not found")
+    entries = preset.get("ModSet", [])
+    for entry in entries:
+        if entry.get("Name") == name:
+            return entry
+    for entry in entries:
+        if utils.split_tags(entry.get("Name", ""))[0] == name:
+            return entry
+    raise KeyError(f"Preset '{name}' not found in bank '{bank}'")
+
+def match_objects(patterns):
+    objects = bpy.context.scene.objects
+    if not patterns:
+        return list(objects)
+    return [obj for obj in objects if any(fnmatch.fnmatchcase(obj.name, p) for p in patterns)]
+
+def run_apply(args, result):
+    # Many of these run at once from batch.py, none of them may create the index or banks
+    store.READ_ONLY = True
+    if args.assets:
+        store.ASSETS_DIR = os.path.abspath(args.assets)
+        store.PREFS_FILE = os.path.join(store.ASSETS_DIR, 'prefs.json')
+    bank = args.bank or store.active_bank()
+    result.update(bank=bank, preset=args.preset)
+    preset = apply.preset_from_entry(find_preset(bank, args.preset))
+    objects = match_objects(args.objects)
+    result["objects"] = len(objects)
+    added = apply.apply_preset(bpy.context, objects, preset)
+    result["applied"] = len(added)
+    if args.save and added:
+        bpy.ops.wm.save_mainfile()
+        result["saved"] = True
+
+def main(argv=None):
+    args = build_parser().parse_args(script_args(argv))
+    result = {"file": bpy.data.filepath, "command": args.command, "ok": False,
+              "objects": 0, "applied": 0, "saved": False, "error": None}
+    start = time.perf_counter()
+    try:
+        run_apply(args, result)
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {str(e)}"
+    result["seconds"] = time.perf_counter() - start
+    text = json.dumps(result)
+    print(RESULT_PREFIX + text)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(text)
+    if not result["ok"]:
+        sys.exit(1)
+    return result
+
+def _load_package():
+    """Import the add-on from this folder, for when this file runs as a script"""
+    import importlib
+    import importlib.util
+    directory = os.path.dirname(os.path.abspath(__file__))
+    module = sys.modules.get('modset')
+    if module is None or os.path.dirname(os.path.abspath(module.__file__)) != directory:
+        spec = importlib.util.spec_from_file_location(
+            'modset', os.path.join(directory, '__init__.py'), submodule_search_locations=[directory])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['modset'] = module
+        spec.loader.exec_module(module)
+    return importlib.import_module('modset.cli')
+
+if __name__ == "__main__":
+    _load_package().main()
@@ -0,0 +1,179 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Binary bank snapshots. Like store.py this must not import bpy.
+#
+#   magic b'MSB2' | flags (1 byte) | records, zlib compressed if flags & 1
+#
+# Every record is a little endian u32 length followed by that many bytes.
+# The first record is a JSON header with the preset name, Preference,
+# Journal/Base, the entry count and the blob count. Then come the blobs:
+# each is a Parameters string stored once, as its 32 character key and
+# the text. Each following record is one ModSet entry: six u32 field
+# lengths (in characters) and then the six fields in ENTRY_KEYS order as
+# one UTF-8 string, so an entry decodes with one unpack and one decode.
+# The Parameters field of an entry is the index of its blob.
+#
+# Blob keys are parameters_key of the canonical text (JSON with sorted
+# keys), so presets with equal parameters share one blob, and only blobs
+# still referenced are written.
+import json
+import zlib
+import struct
+import hashlib
+from collections import OrderedDict
+
+MAGIC = b'MSB2'
+FLAG_ZLIB = 1
+ENTRY_KEYS = ("Name", "Type", "Icon", "Path", "AssetLibrary", "Parameters")
+EXTENSION = '.msb'
+KEY_SIZE = 32
+# Canonical forms kept between saves, most bank saves repeat most texts.
+# Texts that already are canonical are not kept, only their digests.
+CANONICAL_CACHE_SIZE = 8192
+
+_U32 = struct.Struct('<I')
+# Record length followed by the six field lengths of an entry
+_ENTRY_HEAD = struct.Struct('<7I')
+_JSON_COMPACT = (',', ':')
+# parameters_key of a Parameters string -> (blob key, canonical text or None), LRU
+_canonical = OrderedDict()
+
+def parameters_key(text):
+    """Digest of a Parameters string, also the key of the parsed parameter cache"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+def dump_parameters(params):
+    """Parameters string of a dict, in the canonical form blobs are stored in"""
+    return json.dumps(params, sort_keys=True, separators=_JSON_COMPACT, ensure_ascii=False)
+
+def canonical_parameters(text):
+    """(blob key, canonical text) of a Parameters string.
+
+    JSON objects and arrays are dumped again with sorted keys, so equal
+    parameters give equal text whatever order they were captured in.
+    Anything else is kept as it is.
+    """
+    text_key = parameters_key(text)
+    cached = _canonical.get(text_key)
+    if cached is not None:
+        _canonical.move_to_end(text_key)
+        return cached[0], text if cached[1] is None else cached[1]
+    canonical = text
+    try:
+        value = json.loads(text)
+    except ValueError:
+        value = None
+    if isinstance(value, (dict, list)):
+        canonical = dump_parameters(value)
+    if canonical == text:
+        _canonical[text_key] = (text_key.hex(), None)
+    else:
+        _canonical[text_key] = (parameters_key(canonical).hex(), canonical)
+    if len(_canonical) > CANONICAL_CACHE_SIZE:
+        _canonical.popitem(last=False)
+    return _canonical[text_key][0], canonical
+
+def _entry_fields(entry):
+    parameters = entry.get("Parameters", {})
+    if not isinstance(parameters, str):
+        parameters = json.dumps(parameters, ensure_ascii=False)
+    return [entry.get(key, "") for key in ENTRY_KEYS[:-1]] + [parameters]
+
+def encode(preset_name, body, compress=True):
+    """Encode a snapshot body ({"Preference", "ModSet", "Journal", ...}) to bytes"""
+    modset = body.get("ModSet", [])
+    blobs = {}
+    blob_parts = []
+    entry_parts = []
+    pack = _ENTRY_HEAD.pack
+    for entry in modset:
+        fields = _entry_fields(entry)
+        key, canonical = canonical_parameters(fields[-1])
+        index = blobs.get(key)
+        if index is None:
+            index = blobs[key] = len(blobs)
+            data = key.encode('ascii') + canonical.encode('utf-8')
+            blob_parts.append(_U32.pack(len(data)))
+            blob_parts.append(data)
+        fields[-1] = str(index)
+        text = ''.join(fields).encode('utf-8')
+        entry_parts.append(pack(len(text) + 24, *map(len, fields)))
+        entry_parts.append(text)
+    header = {key: value for key, value in body.items() if key != "ModSet"}
+    header["Name"] = preset_name
+    header["Count"] = len(modset)
+    header["Blobs"] = len(blobs)
+    header_bytes = json.dumps(header, separators=_JSON_COMPACT, ensure_ascii=False).encode('utf-8')
+    payload = b''.join([_U32.pack(len(header_bytes)), header_bytes] + blob_parts + entry_parts)
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload, 6)
+        flags |= FLAG_ZLIB
+    return MAGIC + bytes((flags,)) + payload
+
+def decode(data):
+    """Decode bytes written by encode, returns (preset name, body)"""
+    if data[:4] != MAGIC or len(data) < 5:
+        raise ValueError("Not a ModSet binary snapshot")
+    payload = data[5:]
+    if data[4] & FLAG_ZLIB:
+        try:
+            payload = zlib.decompress(payload)
+        except zlib.error as e:
+            raise ValueError(f"Corrupt ModSet snapshot: {str(e)}")
+    if len(payload) < 4:
+        raise ValueError("Truncated ModSet snapshot")
+    (length,) = _U32.unpack_from(payload, 0)
+    header = json.loads(payload[4:4 + length].decode('utf-8'))
+    pos = 4 + length
+    size = len(payload)
+    blobs = []
+    for _ in range(header.pop("Blobs", 0)):
+        if pos + 4 > size:
+            raise ValueError("Truncated ModSet snapshot")
+        (length,) = _U32.unpack_from(payload, pos)
+        end = pos + 4 + length
+        if end > size or length < KEY_SIZE:
+            raise ValueError("Corrupt ModSet blob record")
+        blobs.append(payload[pos + 4 + KEY_SIZE:end].decode('utf-8'))
+        pos = end
+    modset = []
+    unpack_entry = _ENTRY_HEAD.unpack_from
+    for _ in range(header.pop("Count", 0)):
+        if pos + 28 > size:
+            raise ValueError("Truncated ModSet snapshot")
+        length, a, b, c, d, e, f = unpack_entry(payload, pos)
+        end = pos + 4 + length
+        if end > size:
+            raise ValueError("Corrupt ModSet entry record")
+        text = payload[pos + 28:end].decode('utf-8')
+        if len(text) != a + b + c + d + e + f:
+            raise ValueError("Corrupt ModSet entry record")
+        b += a
+        c += b
+        d += c
+        e += d
+        try:
+            parameters = blobs[int(text[e:])]
+        except (ValueError, IndexError):
+            raise ValueError("Corrupt ModSet entry record")
+        modset.append({"Name": text[:a], "Type": text[a:b], "Icon": text[b:c],
+                       "Path": text[c:d], "AssetLibrary": text[d:e], "Parameters": parameters})
+        pos = end
+    name = header.pop("Name", None)
+    header["ModSet"] = modset
+    return name, header
+
+def is_container(path):
+    return path.endswith(EXTENSION)
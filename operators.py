@@ -13,29 +13,46 @@
 import bpy
 import os
 import json
-from . import utils
+from . import utils, store, apply, profiling
+
+def update_profiling(self, context):
+    profiling.enable(self.enable_profiling)
 
 class MODSET_AddonPrefs(bpy.types.AddonPreferences):
     bl_idname = __package__
+    enable_profiling: bpy.props.BoolProperty(
+        name='Profiling',
+        description='Time drawing, capture, apply, save and load. Adds a little overhead',
+        default=False,
+        update=update_profiling
+    )
 
     def draw(self, context):
         layout = self.layout
         split = layout.split(factor=0.12843, align=False)
-        split.label(text='Prefs file :', icon_value=0)
+        split.label(text='Preset banks :', icon_value=0)
         split_path = split.split(factor=0.81193, align=False)
-        split_path.label(text=os.path.join(os.path.dirname(__file__), 'assets', 'prefs.json'), icon_value=0)
+        split_path.label(text=store.banks_dir(), icon_value=0)
         split_path.operator('modset.open_prefs_folder', text='Open Folder', icon_value=0, emboss=True)
+        row = layout.row(align=True)
+        row.operator('modset.import_json', text='Import JSON', icon='IMPORT', emboss=True)
+        row.operator('modset.export_json', text='Export Current Bank', icon='EXPORT', emboss=True)
+        row = layout.row(align=True)
+        row.prop(self, 'enable_profiling')
+        row.operator('modset.profile_report', text='Profile Report', icon='TEXT', emboss=True)
 
 class MODSET_OpenPrefsFolder(bpy.types.Operator):
     bl_idname = "modset.open_prefs_folder"
     bl_label = "Open Prefs Folder"
-    bl_description = "Open directory containing prefs file"
-    bl_options = {"REGISTER", "UNDO"}
+    bl_description = "Open directory containing the preset bank files"
+    bl_options = {"REGISTER"}
 
     def execute(self, context):
         import subprocess
         import platform
-        folder_path = os.path.join(os.path.dirname(__file__), 'assets')
+        # Creates the folder and index on first use
+        store.read_index()
+        folder_path = store.banks_dir()
         
         # open folder based on OS
         if platform.system() == "Windows":
@@ -47,17 +64,87 @@ class MODSET_OpenPrefsFolder(bpy.types.Operator):
             
         return {"FINISHED"}
 
+class MODSET_ImportJson(bpy.types.Operator):
+    bl_idname = "modset.import_json"
+    bl_label = "Import JSON"
+    bl_description = "Copy the presets of a prefs.json style file into the banks of the same name"
+    bl_options = {"REGISTER"}
+    filepath: bpy.props.StringProperty(name='File Path', default='', subtype='FILE_PATH')
+    filter_glob: bpy.props.StringProperty(default='*.json', options={'HIDDEN'})
+
+    def execute(self, context):
+        utils.flush_save()
+        try:
+            names = store.import_json(self.filepath)
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, f"Import failed: {str(e)}")
+            return {"CANCELLED"}
+        if len(context.window_manager.modset_prefs):
+            utils.load_bank(context.window_manager)
+        self.report({'INFO'}, f"Imported {len(names)} banks")
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+class MODSET_ExportJson(bpy.types.Operator):
+    bl_idname = "modset.export_json"
+    bl_label = "Export JSON"
+    bl_description = "Write the current bank as a prefs.json style file"
+    bl_options = {"REGISTER"}
+    filepath: bpy.props.StringProperty(name='File Path', default='', subtype='FILE_PATH')
+    filter_glob: bpy.props.StringProperty(default='*.json', options={'HIDDEN'})
+
+    def execute(self, context):
+        utils.flush_save()
+        name = utils.current_bank(context.window_manager)
+        try:
+            store.export_json(name, self.filepath)
+        except (OSError, KeyError) as e:
+            self.report({'ERROR'}, f"Export failed: {str(e)}")
+            return {"CANCELLED"}
+        self.report({'INFO'}, f"Bank '{name}' written to {self.filepath}")
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = utils.current_bank(context.window_manager) + '.json'
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+class MODSET_ProfileReport(bpy.types.Operator):
+    bl_idname = "modset.profile_report"
+    bl_label = "Profile Report"
+    bl_description = "Write the collected timings as JSON"
+    bl_options = {"REGISTER"}
+    filepath: bpy.props.StringProperty(name='File Path', default='', subtype='FILE_PATH')
+    reset: bpy.props.BoolProperty(name='Reset', description='Clear the collected timings afterwards', default=False)
+
+    def execute(self, context):
+        import tempfile
+        filepath = self.filepath or os.path.join(bpy.app.tempdir or tempfile.gettempdir(), 'modset_profile.json')
+        data = profiling.report()
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        if self.reset:
+            profiling.reset()
+        print(json.dumps(data, indent=2))
+        self.report({'INFO'}, f"Profile written to {filepath}")
+        return {"FINISHED"}
+
 class MODSET_ExpandPanel(bpy.types.Operator):
     bl_idname = "modset.expand_panel"
     bl_label = "Expand Panel"
     bl_description = "Expand ModSet panel"
-    bl_options = {"REGISTER", "UNDO"}
+    bl_options = {"INTERNAL"}
 
     def execute(self, context):
-        scene = bpy.context.scene
-        scene.modset_isexpand = not scene.modset_isexpand
-        if scene.modset_isexpand:
-            bpy.ops.modset.load_preset('INVOKE_DEFAULT')
+        wm = context.window_manager
+        wm.modset_isexpand = not wm.modset_isexpand
+        if wm.modset_isexpand:
+            # A no-op unless the bank changed on disk since it was loaded
+            utils.load_bank(wm)
         return {"FINISHED"}
 
     def invoke(self, context, event):
@@ -67,10 +154,10 @@ class MODSET_ToggleSetting(bpy.types.Operator):
     bl_idname = "modset.toggle_setting"
     bl_label = "Toggle Setting"
     bl_description = "Setting mode toggle"
-    bl_options = {"REGISTER", "UNDO"}
+    bl_options = {"INTERNAL"}
 
     def execute(self, context):
-        bpy.context.scene.modset_setting = not bpy.context.scene.modset_setting
+        context.window_manager.modset_setting = not context.window_manager.modset_setting
         return {"FINISHED"}
 
     def invoke(self, context, event):
@@ -79,100 +166,40 @@ class MODSET_ToggleSetting(bpy.types.Operator):
 class MODSET_UserButton(bpy.types.Operator):
     bl_idname = "modset.user_button"
     bl_label = "User Button"
-    bl_description = "Add Modifier to Selected Object"
+    bl_description = "Add Modifier to Selected Object. Alt+Click adds it to all selected objects"
     bl_options = {"REGISTER", "UNDO"}
     collection_index: bpy.props.IntProperty(name='collection index', default=0)
-
+    use_selected: bpy.props.BoolProperty(
+        name='Selected Objects',
+        description='Add the modifier to all selected objects',
+        default=False,
+        options={'SKIP_SAVE'}
+    )
+
+    @profiling.timed_method('MODSET_UserButton')
     def execute(self, context):
-        scene = bpy.context.scene
-        preset = scene.modset_preset[self.collection_index]
-        
-        # Handle geometry node modifiers
-        if preset.modpath != '':
-            if preset.aseetlib == '':
-                bpy.ops.object.modifier_add_node_group(
-                    'INVOKE_DEFAULT',
-                    asset_library_type='ESSENTIALS',
-                    asset_library_identifier='',
-                    relative_asset_identifier=preset.modpath
-                )
-            else:
-                bpy.ops.object.modifier_add_node_group(
-                    'INVOKE_DEFAULT',
-                    asset_library_type='CUSTOM',
-                    asset_library_identifier=preset.aseetlib,
-                    relative_asset_identifier=preset.modpath
-                )
-        # Handle standard modifiers
-        else:
-            bpy.ops.object.modifier_add('INVOKE_DEFAULT', type=preset.modtype)
-        
-        new_mod = bpy.context.object.modifiers.active
-        
-        # Process geometry nodes parameters
-        if preset.parameters != "":
-            try:
-                params = json.loads(preset.parameters)
-                
-                # Restore standard modifier parameters
-                if preset.modpath == '':
-                    from .utils import restore_parameters
-                    restore_parameters(new_mod, params)
-                
-                # Simplified processing for geometry node parameters
-                else:  
-                    for key, value in params.items():
-                        # Process collection name references
-                        if isinstance(value, str):
-                            try:
-                                # Try to find the collection in the scene
-                                collection = bpy.data.collections.get(value)
-                                if collection and key in new_mod:
-                                    # Set collection reference
-                                    new_mod[key] = collection
-                                    print(f"Restored collection reference for GN: {key} = {value}")
-                                    continue
-                                else:
-                                    # Set as regular string if collection not found
-                                    new_mod[key] = value
-                            except Exception as e:
-                                print(f"Failed to set collection value [{key}]: {str(e)}")
-                                new_mod[key] = value
-                        # Ignore complex values like object references, only set basic data types
-                        elif isinstance(value, (int, float, bool)):
-                            try:
-                                new_mod[key] = value
-                            except Exception as e:
-                                print(f"Failed to set value [{key}]: {str(e)}")
-                        # Process list values
-                        elif isinstance(value, list):
-                            try:
-                                new_mod[key] = value
-                            except Exception as e:
-                                print(f"Failed to set list value [{key}]: {str(e)}")
-                
-                # Force viewport update for geometry nodes
-                if preset.modpath != '' or new_mod.type == 'NODES':
-                    # Toggle viewport visibility to force update
-                    current_state = new_mod.show_viewport
-                    new_mod.show_viewport = not current_state
-                    new_mod.show_viewport = current_state
-            except Exception as e:
-                print(f"Parameter parsing error: {str(e)}")
+        wm = context.window_manager
+        preset = wm.modset_preset[self.collection_index]
+        objects = apply.target_objects(context, self.use_selected)
+        # One operator run is one undo step, however many objects get the modifier
+        apply.apply_preset(context, objects, preset)
+        utils.record_preset_use(preset)
         return {"FINISHED"}
 
     def invoke(self, context, event):
+        # Alt+Click adds the modifier to every selected object
+        self.use_selected = self.use_selected or event.alt
         return self.execute(context)
 
 class MODSET_SetActiveButton(bpy.types.Operator):
     bl_idname = "modset.set_active_button"
     bl_label = "Set Active Button"
     bl_description = "Select this modifier"
-    bl_options = {"REGISTER", "UNDO"}
+    bl_options = {"INTERNAL"}
     collection_index: bpy.props.IntProperty(name='collection index', default=0)
 
     def execute(self, context):
-        bpy.context.scene.modset_active = self.collection_index
+        context.window_manager.modset_active = self.collection_index
         return {"FINISHED"}
 
     def invoke(self, context, event):
@@ -182,125 +209,106 @@ class MODSET_AddSelected(bpy.types.Operator):
     bl_idname = "modset.add_selected"
     bl_label = "Add Selected"
     bl_description = "Add selected Modifier to ModSet"
-    bl_options = {"REGISTER", "UNDO"}
+    bl_options = {"REGISTER"}
 
     def execute(self, context):
-        scene = bpy.context.scene
-        if scene.modset_active < 0:
-            scene.modset_active = -1
-        item = scene.modset_preset.add()
-        if (scene.modset_setting and
-            utils.check_prop("bpy.context.scene.modset_preset", globals(), locals()) and
-            len(scene.modset_preset) > scene.modset_active):
-            scene.modset_preset.move(len(scene.modset_preset) - 1, scene.modset_active + 1)
-            item = scene.modset_preset[scene.modset_active + 1]
-        active_mod = bpy.context.object.modifiers.active
-        if utils.check_prop("bpy.context.object.modifiers.active.node_group.id_data", globals(), locals()):
-            if utils.check_prop("bpy.context.object.modifiers.active.node_group.library_weak_reference.filepath", globals(), locals()):
-                filepath = active_mod.node_group.library_weak_reference.filepath
-                if os.path.dirname(bpy.app.binary_path) in filepath:
+        wm = context.window_manager
+        if wm.modset_active < 0:
+            wm.modset_active = -1
+        with utils.muted_changes():
+            item = wm.modset_preset.add()
+            index = len(wm.modset_preset) - 1
+            if (wm.modset_setting and
+                utils.check_prop("bpy.context.window_manager.modset_preset", globals(), locals()) and
+                len(wm.modset_preset) > wm.modset_active):
+                wm.modset_preset.move(index, wm.modset_active + 1)
+                index = wm.modset_active + 1
+                item = wm.modset_preset[index]
+            active_mod = bpy.context.object.modifiers.active
+            if utils.check_prop("bpy.context.object.modifiers.active.node_group.id_data", globals(), locals()):
+                if utils.check_prop("bpy.context.object.modifiers.active.node_group.library_weak_reference.filepath", globals(), locals()):
                     orig = active_mod.name
                     dot = orig.find(".")
                     modname = orig[:dot] if dot != -1 else orig
-                    item.modpath = os.path.join(filepath, 'NodeTree', modname).split('assets\\')[1]
+                    asset = utils.resolve_node_group_asset(active_mod.node_group)
+                    if asset is None:
+                        # The library file is not in any asset library
+                        wm.modset_preset.remove(index)
+                        return {"FINISHED"}
+                    item.aseetlib, item.modpath = asset
                     item.modname = modname
                     item.modicon = 'GEOMETRY_NODES'
-                    scene.modset_active += 1
-                    bpy.ops.modset.autosave('INVOKE_DEFAULT')
+                    wm.modset_active += 1
+                else:
+                    # Local node groups can't be re-added from a library
+                    wm.modset_preset.remove(index)
+                    return {"FINISHED"}
+                # Retrieve all parameters from the target modifier
+                if active_mod.type == 'NODES':
                     params = utils.get_geometry_nodes_parameters(active_mod)
                     if params:
-                        try:
-                            item.parameters = json.dumps(params, separators=(',', ':'), ensure_ascii=False)
-                            print(f"Final saved data: {item.parameters}")
-                            bpy.ops.modset.autosave('INVOKE_DEFAULT')
-                        except Exception as e:
-                            print(f"JSON serialization error: {str(e)}")
-                            item.parameters = ""
+                        item.parameters = utils.dump_parameters(params)
                     else:
                         print("Warning: No parameters found in geometry nodes")
                         item.parameters = ""
-                        bpy.ops.modset.autosave('INVOKE_DEFAULT')
-                else:
-                    orig = active_mod.name
-                    dot = orig.find(".")
-                    modname = orig[:dot] if dot != -1 else orig
-                    for lib in bpy.context.preferences.filepaths.asset_libraries:
-                        if lib.path in active_mod.node_group.library_weak_reference.filepath:
-                            item.aseetlib = lib.name
-                            item.modpath = os.path.join(os.path.basename(active_mod.node_group.library_weak_reference.filepath),
-                                                        'NodeTree', modname)
-                            item.modname = modname
-                            item.modicon = 'GEOMETRY_NODES'
-                            scene.modset_active += 1
-                            bpy.ops.modset.autosave('INVOKE_DEFAULT')
-                            params = utils.get_geometry_nodes_parameters(active_mod)
-                            if params:
-                                try:
-                                    item.parameters = json.dumps(params, separators=(',', ':'), ensure_ascii=False)
-                                    print(f"Final saved data: {item.parameters}")
-                                    bpy.ops.modset.autosave('INVOKE_DEFAULT')
-                                except Exception as e:
-                                    print(f"JSON serialization error: {str(e)}")
-                                    item.parameters = ""
-                            else:
-                                print("Warning: No parameters found in geometry nodes")
-                                item.parameters = ""
-                                bpy.ops.modset.autosave('INVOKE_DEFAULT')
-                            break
-            else:
-                for i, preset_item in enumerate(scene.modset_preset):
-                    if preset_item == item:
-                        scene.modset_preset.remove(i)
-                        break
-            # Retrieve all parameters from the target modifier
-            if active_mod.type == 'NODES':
-                params = utils.get_geometry_nodes_parameters(active_mod)
-                if params:
-                    item.parameters = json.dumps(params, separators=(',', ':'), ensure_ascii=False)
-                    print(f"Final saved data: {item.parameters}")
-                    bpy.ops.modset.autosave('INVOKE_DEFAULT')
                 else:
-                    print("Warning: No parameters found in geometry nodes")
-                    item.parameters = ""
-                    bpy.ops.modset.autosave('INVOKE_DEFAULT')
+                    params = utils.get_modifier_parameters(active_mod)
+                    item.parameters = utils.dump_parameters(params)
+
             else:
+                active_mod = bpy.context.view_layer.objects.active.modifiers.active
+                item.modtype = active_mod.type
+                item.modicon = utils.get_mod_icon(active_mod.type)
+                orig = active_mod.name
+                dot = orig.find(".")
+                item.modname = orig[:dot] if dot != -1 else orig
+                wm.modset_active += 1
                 params = utils.get_modifier_parameters(active_mod)
-                item.parameters = json.dumps(params, separators=(',', ':'), ensure_ascii=False)
-                print(f"Saved Parameters: {item.parameters}")
-                bpy.ops.modset.autosave('INVOKE_DEFAULT')
-
-        else:
-            active_mod = bpy.context.view_layer.objects.active.modifiers.active
-            item.modtype = active_mod.type
-            item.modicon = utils.get_mod_icon(active_mod.type)
-            orig = active_mod.name
-            dot = orig.find(".")
-            item.modname = orig[:dot] if dot != -1 else orig
-            scene.modset_active += 1
-            params = utils.get_modifier_parameters(active_mod)
-            item.parameters = json.dumps(params, separators=(',', ':'), ensure_ascii=False)
-            print(f"Saved Parameters: {item.parameters}")
-            bpy.ops.modset.autosave('INVOKE_DEFAULT')
+                item.parameters = utils.dump_parameters(params)
+        utils.record_change({"op": "add", "index": index, "entry": utils.preset_to_dict(item)})
         return {"FINISHED"}
 
     def invoke(self, context, event):
         return self.execute(context)
 
+class MODSET_AddStack(bpy.types.Operator):
+    bl_idname = "modset.add_stack"
+    bl_label = "Add Stack"
+    bl_description = "Add every modifier of the active object to ModSet as one preset"
+    bl_options = {"REGISTER"}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.object
+        return obj is not None and hasattr(obj, 'modifiers') and len(obj.modifiers) > 0
+
+    def execute(self, context):
+        wm = context.window_manager
+        if wm.modset_active < 0:
+            wm.modset_active = -1
+        entry = utils.capture_stack(context.object)
+        with utils.muted_changes():
+            item = wm.modset_preset.add()
+            index = len(wm.modset_preset) - 1
+            if wm.modset_setting and len(wm.modset_preset) > wm.modset_active:
+                wm.modset_preset.move(index, wm.modset_active + 1)
+                index = wm.modset_active + 1
+                item = wm.modset_preset[index]
+            utils.fill_item(item, entry)
+            wm.modset_active += 1
+        utils.record_change({"op": "add", "index": index, "entry": utils.preset_to_dict(item)})
+        return {"FINISHED"}
+
 class MODSET_Autosave(bpy.types.Operator):
     bl_idname = "modset.autosave"
     bl_label = "AutoSave"
     bl_description = ""
-    bl_options = {"REGISTER", "UNDO"}
+    bl_options = {"INTERNAL"}
 
+    @profiling.timed_method('MODSET_Autosave')
     def execute(self, context):
-        utils.ui_data['values'] = []
-        file_path = os.path.join(os.path.dirname(__file__), 'assets', 'prefs.json')
-        with open(file_path, "w") as f:
-            json.dump([], f)
-        for i in range(len(bpy.context.scene.modset_preset)):
-            if utils.check_prop(f"bpy.context.scene.modset_preset[{i}]", globals(), locals()):
-                utils.add_to_ui_list(bpy.context.scene.modset_preset[i])
-        utils.save_preset_json('Preset1')
+        # Writes a full snapshot, coalesced by the save scheduler
+        utils.request_save()
         return {"FINISHED"}
 
     def invoke(self, context, event):
@@ -309,63 +317,112 @@ class MODSET_Autosave(bpy.types.Operator):
 class MODSET_LoadPreset(bpy.types.Operator):
     bl_idname = "modset.load_preset"
     bl_label = "Load Preset"
-    bl_description = ("Load modifier set from Json file. "
-                      "Put prefs.json in Prefs folder first, then click this button.")
-    bl_options = {"REGISTER", "UNDO"}
+    bl_description = "Reload the current preset bank from its file"
+    bl_options = {"REGISTER"}
 
+    @profiling.timed_method('MODSET_LoadPreset')
     def execute(self, context):
-        scene = bpy.context.scene
-        while len(scene.modset_prefs) < 3:
-            scene.modset_prefs.add()
-        scene.modset_preset.clear()
-        file_json = os.path.join(os.path.dirname(__file__), 'assets', 'prefs.json')
-        preset_to_load = 'Preset1'
-        with open(file_json, 'r') as json_file:
-            loaded = json.load(json_file)
-        preset_data = None
-        for item in loaded:
-            if isinstance(item, dict) and preset_to_load in item:
-                preset_data = item[preset_to_load]
-                break
-        if preset_data is None:
-            print(f"Error: Preset '{preset_to_load}' not found.")
-        else:
-            p_data = preset_data.get("Preference", {})
-            colnum = p_data.get("column_number", 2)
-            show_name = p_data.get("show_mod_name", True)
-            show_icon = p_data.get("show_mod_icon", True)
-            show_preset = p_data.get("show_preset", False)
-            for mod in preset_data.get("ModSet", []):
-                item = scene.modset_preset.add()
-                item.modname = mod.get("Name", "")
-                item.modtype = mod.get("Type", "")
-                item.modicon = mod.get("Icon", "")
-                item.modpath = mod.get("Path", "")
-                item.aseetlib = mod.get("AssetLibrary", "")
-                parameters = mod.get("Parameters", {})
-                item.parameters = parameters if isinstance(parameters, str) else json.dumps(parameters, ensure_ascii=False)
-            prefs = scene.modset_prefs[0]
-            prefs.columnnumber = colnum
-            prefs.showmodicon = show_icon
-            prefs.showmodname = show_name
-            prefs.sna_show_preset = show_preset
+        utils.load_bank(context.window_manager)
         return {"FINISHED"}
 
     def invoke(self, context, event):
         return self.execute(context)
 
+class MODSET_SwitchBank(bpy.types.Operator):
+    bl_idname = "modset.switch_bank"
+    bl_label = "Switch Bank"
+    bl_description = "Load another preset bank"
+    bl_options = {"REGISTER"}
+    bank: bpy.props.EnumProperty(name='Bank', items=utils.bank_items)
+
+    def execute(self, context):
+        if not utils.load_bank(context.window_manager, self.bank):
+            self.report({'ERROR'}, f"Bank '{self.bank}' not found")
+            return {"CANCELLED"}
+        store.set_active_bank(self.bank)
+        return {"FINISHED"}
+
+class MODSET_NewBank(bpy.types.Operator):
+    bl_idname = "modset.new_bank"
+    bl_label = "New Bank"
+    bl_description = "Create an empty preset bank and switch to it"
+    bl_options = {"REGISTER"}
+    bank_name: bpy.props.StringProperty(name='Name', default='Presets')
+
+    def execute(self, context):
+        wm = context.window_manager
+        utils.flush_save()
+        preference = utils.prefs_to_dict(wm) if len(wm.modset_prefs) else None
+        try:
+            store.create_bank(self.bank_name, preference)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {"CANCELLED"}
+        utils.load_bank(wm, self.bank_name)
+        store.set_active_bank(self.bank_name)
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+class MODSET_RenameBank(bpy.types.Operator):
+    bl_idname = "modset.rename_bank"
+    bl_label = "Rename Bank"
+    bl_description = "Rename the current preset bank"
+    bl_options = {"REGISTER"}
+    bank_name: bpy.props.StringProperty(name='Name', default='')
+
+    def execute(self, context):
+        wm = context.window_manager
+        utils.flush_save()
+        try:
+            store.rename_bank(utils.current_bank(wm), self.bank_name)
+        except (KeyError, ValueError) as e:
+            self.report({'ERROR'}, str(e))
+            return {"CANCELLED"}
+        if len(wm.modset_prefs):
+            wm.modset_prefs[0].presetname = self.bank_name
+        if context.scene is not None:
+            context.scene.modset_bank = self.bank_name
+        utils.invalidate_draw_state(context=False)
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        self.bank_name = utils.current_bank(context.window_manager)
+        return context.window_manager.invoke_props_dialog(self)
+
+class MODSET_DeleteBank(bpy.types.Operator):
+    bl_idname = "modset.delete_bank"
+    bl_label = "Delete Bank"
+    bl_description = "Delete the current preset bank and its file"
+    bl_options = {"REGISTER"}
+
+    def execute(self, context):
+        wm = context.window_manager
+        utils.flush_save()
+        try:
+            store.delete_bank(utils.current_bank(wm))
+        except (KeyError, ValueError) as e:
+            self.report({'ERROR'}, str(e))
+            return {"CANCELLED"}
+        utils.load_bank(wm, store.active_bank())
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+
 class MODSET_DeleteAll(bpy.types.Operator):
     bl_idname = "modset.delete_all"
     bl_label = "Delete All"
     bl_description = "Delete all ModSet"
-    bl_options = {"REGISTER", "UNDO"}
+    bl_options = {"REGISTER"}
 
     def execute(self, context):
-        bpy.context.scene.modset_preset.clear()
+        context.window_manager.modset_preset.clear()
         if bpy.context.screen:
             for area in bpy.context.screen.areas:
                 area.tag_redraw()
-        bpy.ops.modset.autosave('INVOKE_DEFAULT')
+        utils.record_change({"op": "clear"})
         return {"FINISHED"}
 
     def invoke(self, context, event):
@@ -375,16 +432,16 @@ class MODSET_SelectIcon(bpy.types.Operator):
     bl_idname = "modset.select_icon"
     bl_label = "Select Icon"
     bl_description = ""
-    bl_options = {"REGISTER", "UNDO"}
+    bl_options = {"REGISTER"}
     s_icon: bpy.props.StringProperty(name='Icon Name', default='')
 
     def execute(self, context):
-        idx = bpy.context.scene.modset_active
-        bpy.context.scene.modset_preset[idx].modicon = self.s_icon
+        idx = context.window_manager.modset_active
+        # Journaled by the modicon update callback
+        context.window_manager.modset_preset[idx].modicon = self.s_icon
         if bpy.context.screen:
             for area in bpy.context.screen.areas:
                 area.tag_redraw()
-        bpy.ops.modset.autosave('INVOKE_DEFAULT')
         return {"FINISHED"}
 
     def invoke(self, context, event):
@@ -394,16 +451,16 @@ class MODSET_DeleteActive(bpy.types.Operator):
     bl_idname = "modset.delete_active"
     bl_label = "Delete Active"
     bl_description = "Delete active modifier from ModSet"
-    bl_options = {"REGISTER", "UNDO"}
+    bl_options = {"REGISTER"}
     collection_index: bpy.props.IntProperty(name='collection index', default=0)
 
     def execute(self, context):
-        scene = bpy.context.scene
-        if len(scene.modset_preset) > scene.modset_active:
-            scene.modset_preset.remove(scene.modset_active)
-        if len(scene.modset_preset) <= scene.modset_active:
-            scene.modset_active = int(scene.modset_active - 1)
-        bpy.ops.modset.autosave('INVOKE_DEFAULT')
+        wm = context.window_manager
+        if len(wm.modset_preset) > wm.modset_active:
+            wm.modset_preset.remove(wm.modset_active)
+            utils.record_change({"op": "remove", "index": wm.modset_active})
+        if len(wm.modset_preset) <= wm.modset_active:
+            wm.modset_active = int(wm.modset_active - 1)
         return {"FINISHED"}
 
     def invoke(self, context, event):
@@ -413,10 +470,45 @@ class MODSET_OpenIconPicker(bpy.types.Operator):
     bl_idname = "modset.open_icon_picker"
     bl_label = "Open Icon Picker"
     bl_description = ""
-    bl_options = {"REGISTER", "UNDO"}
+    bl_options = {"INTERNAL"}
 
     def execute(self, context):
-        bpy.ops.wm.call_panel(name="modset.icon_panel", keep_open=False)
+        # Stay open while the search field, category and page arrows are used
+        bpy.ops.wm.call_panel(name="modset.icon_panel", keep_open=True)
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        return self.execute(context)
+
+class MODSET_IconPage(bpy.types.Operator):
+    bl_idname = "modset.icon_page"
+    bl_label = "Icon Page"
+    bl_description = "Show another page of icons"
+    bl_options = {"INTERNAL"}
+    s_amount: bpy.props.IntProperty(name='amount', default=1)
+
+    def execute(self, context):
+        wm = context.window_manager
+        matches = utils.search_icons(wm.modset_icon_search, wm.modset_icon_category)
+        page_count = max(1, -(-len(matches) // utils.ICON_PAGE_SIZE))
+        wm.modset_icon_page = max(0, min(wm.modset_icon_page + self.s_amount, page_count - 1))
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        return self.execute(context)
+
+class MODSET_ButtonPage(bpy.types.Operator):
+    bl_idname = "modset.button_page"
+    bl_label = "Button Page"
+    bl_description = "Show another page of presets"
+    bl_options = {"INTERNAL"}
+    s_amount: bpy.props.IntProperty(name='amount', default=1)
+
+    def execute(self, context):
+        wm = context.window_manager
+        state = utils.get_draw_state(context)
+        _, page, page_count, _ = utils.visible_buttons(wm, state)
+        wm.modset_page = max(0, min(page + self.s_amount, page_count - 1))
         return {"FINISHED"}
 
     def invoke(self, context, event):
@@ -426,33 +518,38 @@ class MODSET_MoveButton(bpy.types.Operator):
     bl_idname = "modset.move_button"
     bl_label = "Move Button"
     bl_description = ""
-    bl_options = {"REGISTER", "UNDO"}
+    bl_options = {"REGISTER"}
     s_amount: bpy.props.IntProperty(name='amount', default=-2)
 
     def execute(self, context):
-        scene = bpy.context.scene
+        wm = context.window_manager
         if self.s_amount < 0:
-            scene.modset_preset.move(scene.modset_active, scene.modset_active + self.s_amount)
-            scene.modset_preset.move(scene.modset_active + self.s_amount + 1, scene.modset_active)
+            moves = [(wm.modset_active, wm.modset_active + self.s_amount),
+                     (wm.modset_active + self.s_amount + 1, wm.modset_active)]
         else:
-            scene.modset_preset.move(scene.modset_active, scene.modset_active + self.s_amount)
-            scene.modset_preset.move(scene.modset_active + self.s_amount - 1, scene.modset_active)
-        scene.modset_active += self.s_amount
-        bpy.ops.modset.autosave('INVOKE_DEFAULT')
+            moves = [(wm.modset_active, wm.modset_active + self.s_amount),
+                     (wm.modset_active + self.s_amount - 1, wm.modset_active)]
+        for src, dst in moves:
+            wm.modset_preset.move(src, dst)
+            utils.record_change({"op": "move", "from": src, "to": dst})
+        wm.modset_active += self.s_amount
         return {"FINISHED"}
 
     def invoke(self, context, event):
         return self.execute(context)
 
 class MODSET_ModItem(bpy.types.PropertyGroup):
-    modname: bpy.props.StringProperty(name='MODNAME', default='')
+    modname: bpy.props.StringProperty(name='MODNAME', default='', update=utils.update_modname)
     modtype: bpy.props.StringProperty(name='MODTYPE', default='')
-    modicon: bpy.props.StringProperty(name='MODICON', default='')
+    modicon: bpy.props.StringProperty(name='MODICON', default='', update=utils.update_modicon)
+    # Resolved from modicon by its update callback, so drawing needs no lookup
+    iconvalue: bpy.props.IntProperty(name='Icon Value', default=0, options={'HIDDEN'})
     modpath: bpy.props.StringProperty(name='MODPATH', default='', subtype='FILE_PATH')
     aseetlib: bpy.props.StringProperty(name='ASEETLIB', default='')
     parameters: bpy.props.StringProperty(name='Parameters', default='')
 
 class MODSET_Prefs(bpy.types.PropertyGroup):
+    # Name of the preset bank loaded into the session library
     presetname: bpy.props.StringProperty(name='PresetName', default='Preset')
     columnnumber: bpy.props.IntProperty(name='ColumnNumber', default=2, min=1, max=10, update=utils.update_colnum)
     showmodname: bpy.props.BoolProperty(name='ShowModName', default=True, update=utils.update_show_name)
@@ -462,7 +559,7 @@ class MODSET_DebugAddAllModifiers(bpy.types.Operator):
     """Add all modifiers from active object to the list"""
     bl_idname = "modset.debug_add_all_modifiers"
     bl_label = "Debug: Add All Modifiers"
-    bl_options = {'REGISTER', 'UNDO', 'INTERNAL'}
+    bl_options = {'REGISTER', 'INTERNAL'}
 
     def execute(self, context):
         obj = context.active_object
@@ -471,60 +568,14 @@ class MODSET_DebugAddAllModifiers(bpy.types.Operator):
             return {'CANCELLED'}
 
         for mod in obj.modifiers:
-            # Add new item to the list
-            item = context.scene.modset_preset.add()
-            
-            # Check if it's a Geometry Nodes modifier
-            if mod.type == 'NODES' and mod.node_group:
-                # Process geometry nodes modifier
-                item.modtype = mod.type
-                item.modicon = 'GEOMETRY_NODES'
-                item.modname = mod.name
-                
-                # Process node group from asset library
-                if hasattr(mod.node_group, 'library_weak_reference') and mod.node_group.library_weak_reference:
-                    filepath = mod.node_group.library_weak_reference.filepath
-                    
-                    # For Blender built-in assets
-                    if os.path.dirname(bpy.app.binary_path) in filepath:
-                        modname = mod.name.split('.')[0] if '.' in mod.name else mod.name
-                        item.modpath = os.path.join(filepath, 'NodeTree', modname).split('assets\\')[1]
-                        item.aseetlib = ''
-                    # For custom asset libraries
-                    else:
-                        modname = mod.name.split('.')[0] if '.' in mod.name else mod.name
-                        for lib in context.preferences.filepaths.asset_libraries:
-                            if lib.path in filepath:
-                                item.aseetlib = lib.name
-                                item.modpath = os.path.join(
-                                    os.path.basename(filepath),
-                                    'NodeTree', 
-                                    modname
-                                )
-                                break
-                
-                # Get geometry nodes parameters
-                params = utils.get_geometry_nodes_parameters(mod)
-            else:
-                # Process standard modifier
-                item.modtype = mod.type
-                item.modicon = utils.get_mod_icon(mod.type)
-                item.modname = mod.name
-                item.modpath = ''
-                item.aseetlib = ''
-                
-                # Get standard modifier parameters
-                params = utils.get_modifier_parameters(mod)
-            
-            # Serialize and save parameters
-            try:
-                item.parameters = json.dumps(params, separators=(',', ':'), ensure_ascii=False)
-                print(f"Saved parameters ({mod.name}): {params}")
-            except Exception as e:
-                print(f"Parameter serialization error ({mod.name}): {str(e)}")
-                item.parameters = "{}"
+            entry = utils.capture_modifier(mod)
+            print(f"Saved parameters ({mod.name}): {entry['Parameters']}")
+            item = context.window_manager.modset_preset.add()
+            with utils.muted_changes():
+                utils.fill_item(item, entry)
+            utils.record_change({"op": "add", "index": len(context.window_manager.modset_preset) - 1,
+                                 "entry": utils.preset_to_dict(item)})
         
-        bpy.ops.modset.autosave('INVOKE_DEFAULT')
         self.report({'INFO'}, f"Added {len(obj.modifiers)} modifiers")
         return {'FINISHED'}
 
@@ -540,105 +591,41 @@ class MODSET_DebugApplyAllModifiers(bpy.types.Operator):
             self.report({'ERROR'}, "No active object")
             return {'CANCELLED'}
 
-        for item in context.scene.modset_preset:
-            try:
-                if item.modtype == 'NODES' or item.modpath:
-                    if item.modpath:
-                        lib_type = 'CUSTOM' if item.aseetlib else 'ESSENTIALS'
-                        
-                        if hasattr(bpy.ops.object, 'modifier_add_node_group'):
-                            bpy.ops.object.modifier_add_node_group(
-                                'EXEC_DEFAULT',
-                                asset_library_type=lib_type,
-                                asset_library_identifier=item.aseetlib,
-                                relative_asset_identifier=item.modpath
-                            )
-                        else:
-                            print(f"Cannot add node group directly: {item.modpath}")
-                            continue
-                    else:
-                        bpy.ops.object.modifier_add('EXEC_DEFAULT', type='NODES')
-                else:
-                    bpy.ops.object.modifier_add('EXEC_DEFAULT', type=item.modtype)
-                
-                new_mod = obj.modifiers[-1]
-                new_mod.name = item.modname
-                new_mod.show_expanded = True
-                new_mod.show_viewport = False
-                new_mod.show_render = False
-                
-                # Apply parameters
-                if item.parameters:
-                    try:
-                        params = json.loads(item.parameters)
-                        
-                        # For geometry nodes modifiers
-                        if item.modtype == 'NODES' or item.modpath:
-                            for key, value in params.items():
-                                try:
-                                    if key in new_mod:
-                                        # Process collection references
-                                        if isinstance(value, str):
-                                            # Try to find the collection in scene
-                                            collection = bpy.data.collections.get(value)
-                                            if collection:
-                                                # Set collection reference
-                                                new_mod[key] = collection
-                                                print(f"Restored collection reference for GN: {key} = {value}")
-                                                continue
-                                        
-                                        # Process list values
-                                        elif isinstance(value, list):
-                                            if all(isinstance(x, (int, float)) for x in value):
-                                                value = [float(x) for x in value]
-                                            try:
-                                                new_mod[key] = value
-                                            except Exception as e:
-                                                print(f"Failed to set list value [{key}]: {str(e)}")
-                                        else:
-                                            if isinstance(value, str):
-                                                try:
-                                                    if '.' in value:
-                                                        value = float(value)
-                                                    else:
-                                                        value = int(value)
-                                                except ValueError:
-                                                    pass
-                                            try:
-                                                new_mod[key] = value
-                                            except Exception as e:
-                                                print(f"Failed to set value [{key}]: {str(e)}")
-                                        print(f"Set geometry node parameter: {key} = {value} ({type(value)})")
-                                except Exception as e:
-                                    print(f"Geometry node setting error [{key}]: {str(e)}")
-                                    
-                        else:
-                            # For standard modifiers
-                            utils.restore_parameters(new_mod, params)
-                    except Exception as e:
-                        print(f"Parameter application error: {str(e)}")
-            except Exception as e:
-                print(f"Modifier addition error ({item.modname}): {str(e)}")
-                continue
-
-        self.report({'INFO'}, f"Applied {len(context.scene.modset_preset)} modifiers (All panels expanded)")
+        # Every modifier is written before the object is tagged, once
+        with apply.batched_updates():
+            for item in context.window_manager.modset_preset:
+                for new_mod in apply.apply_preset(context, [obj], item, hidden=True):
+                    new_mod.show_expanded = True
+                    new_mod.show_render = False
+
+        self.report({'INFO'}, f"Applied {len(context.window_manager.modset_preset)} modifiers (All panels expanded)")
         return {'FINISHED'}
 
 classes = [
     MODSET_AddonPrefs,
     MODSET_OpenPrefsFolder,
+    MODSET_ImportJson,
+    MODSET_ExportJson,
+    MODSET_ProfileReport,
     MODSET_ExpandPanel,
     MODSET_ToggleSetting,
     MODSET_UserButton,
     MODSET_SetActiveButton,
     MODSET_AddSelected,
+    MODSET_AddStack,
     MODSET_Autosave,
     MODSET_LoadPreset,
+    MODSET_SwitchBank,
+    MODSET_NewBank,
+    MODSET_RenameBank,
+    MODSET_DeleteBank,
     MODSET_DeleteAll,
     MODSET_SelectIcon,
     MODSET_DeleteActive,
     MODSET_OpenIconPicker,
+    MODSET_IconPage,
     MODSET_MoveButton,
+    MODSET_ButtonPage,
     MODSET_ModItem,
     MODSET_Prefs,
     MODSET_DebugAddAllModifiers,
@@ -648,21 +635,42 @@ classes = [
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
-    bpy.types.Scene.modset_preset = bpy.props.CollectionProperty(type=MODSET_ModItem)
-    bpy.types.Scene.modset_prefs = bpy.props.CollectionProperty(type=MODSET_Prefs)
-    bpy.types.Scene.modset_isexpand = bpy.props.BoolProperty(name='IsExpand', default=False)
-    bpy.types.Scene.modset_setting = bpy.props.BoolProperty(name='IsSetting', default=False)
-    bpy.types.Scene.sna_show_preset = bpy.props.BoolProperty(name='SHOW_PRESET', default=False, update=utils.update_show_preset)
-    bpy.types.Scene.modset_current = bpy.props.IntProperty(name='CURRENT_PRESET_ID', default=0, min=0, max=2)
-    bpy.types.Scene.modset_active = bpy.props.IntProperty(name='ActiveButtonIndex', default=0)
+    addon = bpy.context.preferences.addons.get(__package__)
+    if addon is not None and addon.preferences.enable_profiling:
+        profiling.enable(True)
+    # The library is held once per session and never saved in .blend files,
+    # scenes only keep the name of the bank they were last used with
+    bpy.types.Scene.modset_bank = bpy.props.StringProperty(name='ModSet Bank', default='')
+    bpy.types.WindowManager.modset_preset = bpy.props.CollectionProperty(type=MODSET_ModItem)
+    bpy.types.WindowManager.modset_prefs = bpy.props.CollectionProperty(type=MODSET_Prefs)
+    bpy.types.WindowManager.modset_isexpand = bpy.props.BoolProperty(name='IsExpand', default=False)
+    bpy.types.WindowManager.modset_setting = bpy.props.BoolProperty(name='IsSetting', default=False)
+    bpy.types.WindowManager.sna_show_preset = bpy.props.BoolProperty(name='SHOW_PRESET', default=False, update=utils.update_show_preset)
+    bpy.types.WindowManager.modset_active = bpy.props.IntProperty(name='ActiveButtonIndex', default=0)
+    bpy.types.WindowManager.modset_search = bpy.props.StringProperty(
+        name='Search Presets', default='', options={'TEXTEDIT_UPDATE'}, update=utils.update_button_filter)
+    bpy.types.WindowManager.modset_tag = bpy.props.EnumProperty(
+        name='Tag', items=utils.button_tag_items, update=utils.update_button_filter)
+    bpy.types.WindowManager.modset_page = bpy.props.IntProperty(name='Preset Page', default=0, min=0)
+    bpy.types.WindowManager.modset_icon_search = bpy.props.StringProperty(
+        name='Search Icons', default='', options={'TEXTEDIT_UPDATE'}, update=utils.update_icon_filter)
+    bpy.types.WindowManager.modset_icon_category = bpy.props.EnumProperty(
+        name='Icon Category', items=utils.icon_category_items, update=utils.update_icon_filter)
+    bpy.types.WindowManager.modset_icon_page = bpy.props.IntProperty(name='Icon Page', default=0, min=0)
 
 def unregister():
-    del bpy.types.Scene.modset_active
-    del bpy.types.Scene.modset_current
-    del bpy.types.Scene.sna_show_preset
-    del bpy.types.Scene.modset_setting
-    del bpy.types.Scene.modset_isexpand
-    del bpy.types.Scene.modset_prefs
-    del bpy.types.Scene.modset_preset
+    del bpy.types.WindowManager.modset_icon_page
+    del bpy.types.WindowManager.modset_icon_category
+    del bpy.types.WindowManager.modset_icon_search
+    del bpy.types.WindowManager.modset_page
+    del bpy.types.WindowManager.modset_tag
+    del bpy.types.WindowManager.modset_search
+    del bpy.types.WindowManager.modset_active
+    del bpy.types.WindowManager.sna_show_preset
+    del bpy.types.WindowManager.modset_setting
+    del bpy.types.WindowManager.modset_isexpand
+    del bpy.types.WindowManager.modset_prefs
+    del bpy.types.WindowManager.modset_preset
+    del bpy.types.Scene.modset_bank
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
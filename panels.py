@@ -11,12 +11,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 import bpy
-from . import utils
+from . import utils, profiling
 
 # Draw the main ModSet panel in the modifier tab of the Properties editor
 # This function is registered to be called when the modifier panel is drawn
+@profiling.timed_method('draw_mod_panel')
 def draw_mod_panel(self, context):
-    scene = bpy.context.scene
+    wm = context.window_manager
+    state = utils.get_draw_state(context)
+    icons = state['icons']
     layout = self.layout
     box = layout.box()
     row = box.row(align=True)
@@ -25,61 +28,98 @@ def draw_mod_panel(self, context):
     op = row.operator(
         'modset.expand_panel',
         text='',
-        icon_value=utils.str_to_icon('DOWNARROW_HLT') if scene.modset_isexpand else utils.str_to_icon('RIGHTARROW'),
+        icon_value=icons['DOWNARROW_HLT'] if wm.modset_isexpand else icons['RIGHTARROW'],
         emboss=False
     )
     
     # Panel header with title and settings button
     row.label(text='Modifier Set', icon_value=0)
     row.operator('modset.toggle_setting', text='',
-                 icon_value=utils.str_to_icon('SETTINGS'),
-                 emboss=True, depress=scene.modset_setting)
+                 icon_value=icons['SETTINGS'],
+                 emboss=True, depress=wm.modset_setting)
 
     # Only draw the main panel content if expanded
-    if scene.modset_isexpand:
+    if wm.modset_isexpand:
         col = box.column()
+        if wm.sna_show_preset:
+            utils.draw_bank_row(col, state, wm.modset_setting)
         
+        # Only the buttons of the current page are drawn, so the cost
+        # follows what is visible and not the size of the library
+        visible, page, page_count, matches = utils.visible_buttons(wm, state)
+        filtered = wm.modset_search != '' or wm.modset_tag != 'ALL'
+        if state['count'] >= utils.BUTTON_FILTER_MIN or filtered:
+            row = col.row(align=True)
+            row.prop(wm, 'modset_search', text='', icon='VIEWZOOM')
+            row.prop(wm, 'modset_tag', text='')
+        buttons = state['buttons']
+        colnum = state['columns']
+
+        # Recently used presets, the most used first
+        if not wm.modset_setting and not filtered:
+            recent = utils.recent_buttons(state)
+            if recent:
+                strip = col.grid_flow(columns=colnum, row_major=True, even_columns=True, even_rows=True, align=True)
+                for i in recent[:colnum]:
+                    text, icon_value = buttons[i]
+                    op = strip.operator('modset.user_button', text=text, icon_value=icon_value, emboss=True)
+                    op.collection_index = i
+                col.separator(factor=0.5)
+
         # Create a grid layout based on user preferences
         grid = col.grid_flow(
-            columns=bpy.context.scene.modset_prefs[0].columnnumber,
+            columns=colnum,
             row_major=True, even_columns=True, even_rows=True, align=True
         )
         
         # Settings mode - draw buttons that can be selected/edited
-        if scene.modset_setting:
-            for i, mod in enumerate(scene.modset_preset):
+        if wm.modset_setting:
+            active = wm.modset_active
+            for i in visible:
+                text, icon_value = buttons[i]
                 op = grid.operator(
                     'modset.set_active_button',
-                    text=mod.modname if bpy.context.scene.modset_prefs[0].showmodname else '',
-                    icon_value=(utils.str_to_icon(mod.modicon)
-                                if bpy.context.scene.modset_prefs[0].showmodicon else utils.str_to_icon('NONE')),
+                    text=text,
+                    icon_value=icon_value,
                     emboss=True,
-                    depress=(i == scene.modset_active)
+                    depress=(i == active)
                 )
                 op.collection_index = i
         # Normal mode - draw buttons that apply modifiers when clicked
         else:
-            for i, mod in enumerate(scene.modset_preset):
+            for i in visible:
+                text, icon_value = buttons[i]
                 op = grid.operator(
                     'modset.user_button',
-                    text=mod.modname if bpy.context.scene.modset_prefs[0].showmodname else '',
-                    icon_value=(utils.str_to_icon(mod.modicon)
-                                if bpy.context.scene.modset_prefs[0].showmodicon else utils.str_to_icon('NONE')),
+                    text=text,
+                    icon_value=icon_value,
                     emboss=True
                 )
                 op.collection_index = i
 
         # Add empty spaces to maintain grid layout if needed
-        colnum = bpy.context.scene.modset_prefs[0].columnnumber
-        rem = len(scene.modset_preset) % colnum
+        rem = len(visible) % colnum
         if rem:
             for _ in range(colnum - rem):
                 grid.separator(factor=1.0)
 
+        # Page navigation
+        if page_count > 1:
+            row = col.row(align=True)
+            sub = row.row(align=True)
+            sub.enabled = page > 0
+            op = sub.operator('modset.button_page', text='', icon='TRIA_LEFT', emboss=True)
+            op.s_amount = -1
+            row.label(text=f'{page + 1} / {page_count}   ({matches} presets)')
+            sub = row.row(align=True)
+            sub.enabled = page < page_count - 1
+            op = sub.operator('modset.button_page', text='', icon='TRIA_RIGHT', emboss=True)
+            op.s_amount = 1
+
         # Draw additional UI elements in settings mode
-        if scene.modset_setting:
-            utils.draw_add_button(col)
-            utils.draw_edit_panel(col)
+        if wm.modset_setting:
+            utils.draw_add_button(col, state)
+            utils.draw_edit_panel(col, state)
 
 # Icon picker panel for selecting custom icons
 class MODSET_IconPanel(bpy.types.Panel):
@@ -94,16 +134,43 @@ class MODSET_IconPanel(bpy.types.Panel):
     def draw_header(self, context):
         pass
 
-    # Draw a grid of all available Blender icons for selection
+    # Draw one page of the icons matching the search field and category
     def draw(self, context):
         layout = self.layout
+        wm = context.window_manager
+        row = layout.row(align=True)
+        row.prop(wm, 'modset_icon_search', text='', icon='VIEWZOOM')
+        row.prop(wm, 'modset_icon_category', text='')
+
+        index = utils.get_icon_index()
+        matches = utils.search_icons(wm.modset_icon_search, wm.modset_icon_category)
+        page_size = utils.ICON_PAGE_SIZE
+        page_count = max(1, -(-len(matches) // page_size))
+        page = min(wm.modset_icon_page, page_count - 1)
+
         grid = layout.grid_flow(columns=20, row_major=True, even_columns=True, even_rows=True, align=True)
-        
-        # Get all available icons from Blender's internal icon set
-        icons = list(bpy.types.UILayout.bl_rna.functions["prop"].parameters["icon"].enum_items.values())
-        for item in icons:
-            op = grid.operator('modset.select_icon', text='', icon_value=utils.str_to_icon(item.identifier), emboss=True)
-            op.s_icon = item.identifier
+        names = index['names']
+        values = index['values']
+        # The popup stays open after a pick, so the picked icon is shown pressed
+        current = ''
+        if wm.modset_active < len(wm.modset_preset):
+            current = wm.modset_preset[wm.modset_active].modicon
+        for i in matches[page * page_size:(page + 1) * page_size]:
+            op = grid.operator('modset.select_icon', text='', icon_value=values[i], emboss=True,
+                               depress=names[i] == current)
+            op.s_icon = names[i]
+
+        # Page navigation
+        row = layout.row(align=True)
+        sub = row.row(align=True)
+        sub.enabled = page > 0
+        op = sub.operator('modset.icon_page', text='', icon='TRIA_LEFT', emboss=True)
+        op.s_amount = -1
+        row.label(text=f'{page + 1} / {page_count}   ({len(matches)} icons)')
+        sub = row.row(align=True)
+        sub.enabled = page < page_count - 1
+        op = sub.operator('modset.icon_page', text='', icon='TRIA_RIGHT', emboss=True)
+        op.s_amount = 1
 
 classes = [
     MODSET_IconPanel,
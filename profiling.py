@@ -0,0 +1,104 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Opt-in timing of the add-on's hot paths. While disabled a wrapped call
+# costs one global lookup on top of the call itself.
+# Enable it from the add-on preferences, with profiling.enable(), or by
+# starting Blender with MODSET_PROFILE=1 in the environment.
+import os
+import time
+import functools
+from collections import deque
+
+# Latest durations kept per section for the percentiles
+RING_SIZE = 2048
+
+enabled = os.environ.get('MODSET_PROFILE', '') not in ('', '0')
+_samples = {}
+_counts = {}
+_bytes = {}
+
+def enable(value=True):
+    global enabled
+    enabled = bool(value)
+
+def reset():
+    _samples.clear()
+    _counts.clear()
+    _bytes.clear()
+
+def record(name, seconds):
+    samples = _samples.get(name)
+    if samples is None:
+        samples = _samples[name] = deque(maxlen=RING_SIZE)
+    samples.append(seconds)
+    _counts[name] = _counts.get(name, 0) + 1
+
+def add_bytes(name, count):
+    if enabled and count:
+        _bytes[name] = _bytes.get(name, 0) + count
+
+def timed(name):
+    """Decorator timing a plain function under name"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def timed_method(name):
+    """Decorator for Operator.execute/draw style methods.
+
+    Blender checks the argument count of registered callbacks, so the
+    wrapper keeps the (self, context) signature instead of *args.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, context):
+            if not enabled:
+                return func(self, context)
+            start = time.perf_counter()
+            try:
+                return func(self, context)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def report():
+    """Summary of every section as a JSON-serializable dict, times in milliseconds"""
+    sections = {}
+    for name in sorted(set(_counts) | set(_bytes)):
+        ordered = sorted(_samples.get(name, ()))
+        sections[name] = {
+            "calls": _counts.get(name, 0),
+            "samples": len(ordered),
+            "p50_ms": _percentile(ordered, 0.50) * 1000.0,
+            "p95_ms": _percentile(ordered, 0.95) * 1000.0,
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1000.0,
+            "mean_ms": (sum(ordered) / len(ordered) * 1000.0) if ordered else 0.0,
+            "bytes_written": _bytes.get(name, 0),
+        }
+    return {"enabled": enabled, "ring_size": RING_SIZE, "sections": sections}
@@ -0,0 +1,794 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTIBILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# Preset store file handling.
+# This module must not import bpy so it can be used from background tools.
+#
+# A preset file is a compact snapshot (prefs.json) plus an append-only
+# journal (prefs.journal) with one JSON operation per line. The journal
+# starts with a {"op": "base", "generation": N} header and is only replayed
+# onto a snapshot whose "Journal" generation is N. Compaction folds the
+# journal into a new snapshot that also records how far into the old
+# journal it got ("Base"), so a crash between the two writes never
+# replays an operation twice or loses one.
+#
+# Presets are grouped in named banks. Each bank is one such snapshot and
+# journal pair under assets/banks/, the snapshot in the binary container of
+# container.py for new banks, listed in a small index.json that keeps
+# the entry count and a checksum of every bank so listing them never opens
+# a bank file. The legacy prefs.json is imported into the index once. Later
+# rewrites of it are merged into the banks against a copy of it as it was
+# last imported (legacy_base.json), so entries added to a bank are kept.
+import os
+import re
+import json
+import difflib
+import hashlib
+import tempfile
+import threading
+from . import container
+
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), 'assets')
+PREFS_FILE = os.path.join(ASSETS_DIR, 'prefs.json')
+
+# Journal size in bytes after which it is folded back into the snapshot
+COMPACT_THRESHOLD = 256 * 1024
+# New banks keep their snapshot in the binary container (container.py).
+# Banks with a .json snapshot keep working as before. zlib makes snapshots
+# about a third of the size but loads slower, see bench_container.py.
+BANK_EXTENSION = container.EXTENSION
+COMPRESS_SNAPSHOTS = False
+# Set by tools that run next to each other and must not write the assets
+# folder (cli.py). A missing bank index is then an error, not imported.
+READ_ONLY = False
+
+_JSON_COMPACT = (',', ':')
+
+# Guards journal rewrites against concurrent appends from the main thread
+_lock = threading.RLock()
+# path -> (snapshot generation, base generation) of the snapshot on disk
+_generations = {}
+# path -> checksum of the bank file pair as last written, see _chain
+_digests = {}
+
+def write_atomic(path, text):
+    """Write text to path through a temp file so readers never see a partial file"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    binary = isinstance(text, bytes)
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8')) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file as 0600, keep the mode of the file being replaced
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(text)
+
+def read_snapshot(path):
+    """Load a snapshot in either format as a prefs.json style list"""
+    if container.is_container(path):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        name, body = container.decode(data)
+        return [{name: body}]
+    return read_json(path, []) or []
+
+def read_json(path, default=None):
+    """Load a JSON file, returning default when it does not exist"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+def find_preset(data, preset_name):
+    """Return the preset dict stored under preset_name in a prefs.json list"""
+    for item in data or []:
+        if isinstance(item, dict) and preset_name in item:
+            return item[preset_name]
+    return None
+
+def _chain(digest, text):
+    """Checksum of text appended to content whose checksum is digest"""
+    data = text if isinstance(text, bytes) else text.encode('utf-8')
+    return hashlib.sha1(digest.encode('utf-8') + data).hexdigest()
+
+def journal_path_for(path):
+    return os.path.splitext(path)[0] + '.journal'
+
+def journal_size(path):
+    try:
+        return os.path.getsize(journal_path_for(path))
+    except OSError:
+        return 0
+
+# --- Journal Operations ---
+def apply_op(preset, op):
+    """Apply one journal record to a preset dict in place"""
+    modset = preset.setdefault("ModSet", [])
+    kind = op.get("op")
+    if kind == "add":
+        modset.insert(op["index"], dict(op["entry"]))
+    elif kind == "remove":
+        del modset[op["index"]]
+    elif kind == "move":
+        # Same semantics as bpy_prop_collection.move
+        modset.insert(op["to"], modset.pop(op["from"]))
+    elif kind == "set":
+        modset[op["index"]][op["field"]] = op["value"]
+    elif kind == "prefs":
+        preset["Preference"] = dict(op["value"])
+    elif kind == "clear":
+        modset.clear()
+    else:
+        raise ValueError(f"Unknown journal operation: {kind}")
+
+def _read_journal(journal_path):
+    """Return (generation, records, end offset) of the complete lines in a journal.
+
+    records is a list of (start offset, record). A torn last line from an
+    interrupted append is ignored.
+    """
+    try:
+        with open(journal_path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None, [], 0
+    generation = None
+    records = []
+    pos = 0
+    while True:
+        end = data.find(b'\n', pos)
+        if end == -1:
+            break
+        try:
+            record = json.loads(data[pos:end])
+        except ValueError:
+            break
+        if generation is None:
+            if not isinstance(record, dict) or record.get("op") != "base":
+                return None, [], 0
+            generation = record.get("generation")
+        else:
+            records.append((pos, record))
+        pos = end + 1
+    return generation, records, pos
+
+def _snapshot_generations(preset):
+    base = preset.get("Base") or {}
+    return preset.get("Journal", 0), base.get("generation"), base.get("offset", 0)
+
+def _replay(preset, journal_path):
+    """Replay the matching part of the journal onto preset.
+
+    Returns (journal generation, end offset) or (None, 0) when the journal
+    does not belong to this snapshot.
+    """
+    generation, base_generation, base_offset = _snapshot_generations(preset)
+    journal_generation, records, end = _read_journal(journal_path)
+    if journal_generation is None:
+        return None, 0
+    if journal_generation == generation:
+        start = 0
+    elif base_generation is not None and journal_generation == base_generation:
+        start = base_offset
+    else:
+        return None, 0
+    for offset, record in records:
+        if offset < start:
+            continue
+        try:
+            apply_op(preset, record)
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            print(f"Journal replay stopped at byte {offset}: {str(e)}")
+            break
+    return journal_generation, end
+
+def load_preset(preset_name, path):
+    """Load a preset from its snapshot and replay the journal on top of it"""
+    preset = find_preset(read_snapshot(path), preset_name)
+    if preset is None:
+        return None
+    generation, base_generation, _ = _snapshot_generations(preset)
+    with _lock:
+        _generations[path] = (generation, base_generation)
+        _replay(preset, journal_path_for(path))
+    for key in ("Journal", "Base"):
+        preset.pop(key, None)
+    return preset
+
+def _dump_snapshot(path, preset_name, preset, generation, base=None):
+    body = {"Preference": preset.get("Preference", {}), "ModSet": preset.get("ModSet", []), "Journal": generation}
+    if base:
+        body["Base"] = base
+    if container.is_container(path):
+        return container.encode(preset_name, body, COMPRESS_SNAPSHOTS)
+    return json.dumps([{preset_name: body}], separators=_JSON_COMPACT, ensure_ascii=False)
+
+def _journal_header(generation):
+    return json.dumps({"op": "base", "generation": generation}, separators=_JSON_COMPACT) + '\n'
+
+def write_snapshot(preset_name, preset, path):
+    """Replace the snapshot with preset and start an empty journal"""
+    journal_path = journal_path_for(path)
+    with _lock:
+        journal_generation, _ = _read_header_only(journal_path)
+        known = _generations.get(path, (0, None))
+        generation = max(journal_generation or 0, known[0] or 0) + 1
+        text = _dump_snapshot(path, preset_name, preset, generation)
+        written = write_atomic(path, text)
+        _generations[path] = (generation, None)
+        written += write_atomic(journal_path, _journal_header(generation))
+        _digests[path] = _chain('', text)
+    return written
+
+def append_journal(records, path):
+    """Append operation records to the journal, returns the bytes written"""
+    if not records:
+        return 0
+    journal_path = journal_path_for(path)
+    with _lock:
+        if path not in _generations:
+            preset = None
+            for item in read_snapshot(path):
+                if isinstance(item, dict) and item:
+                    preset = next(iter(item.values()))
+                    break
+            _generations[path] = _snapshot_generations(preset or {})[:2]
+        generation, base_generation = _generations[path]
+        text = ''.join(json.dumps(r, separators=_JSON_COMPACT, ensure_ascii=False) + '\n' for r in records)
+        journal_generation, torn = _read_header_only(journal_path)
+        if journal_generation is None or journal_generation not in (generation, base_generation):
+            # Missing or stale journal, start one that matches the snapshot
+            write_atomic(journal_path, _journal_header(generation))
+        elif torn is not None:
+            # Drop a torn line left behind by an interrupted append
+            with open(journal_path, 'rb+') as f:
+                f.truncate(torn)
+        with open(journal_path, 'a', encoding='utf-8') as f:
+            f.write(text)
+        if path in _digests:
+            _digests[path] = _chain(_digests[path], text)
+    return len(text)
+
+def _read_header_only(journal_path):
+    """Return (generation, torn offset) reading as little of the journal as possible.
+
+    The torn offset is the end of the last complete line, and is only set
+    when the file does not end with a newline.
+    """
+    try:
+        with open(journal_path, 'rb') as f:
+            header = f.readline()
+            size = f.seek(0, os.SEEK_END)
+            torn = None
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b'\n':
+                    torn = _read_journal(journal_path)[2]
+    except FileNotFoundError:
+        return None, None
+    try:
+        record = json.loads(header)
+    except ValueError:
+        return None, None
+    if not isinstance(record, dict) or record.get("op") != "base":
+        return None, None
+    return record.get("generation"), torn
+
+def compact(preset_name, path):
+    """Fold the journal into a new snapshot.
+
+    Safe to run on a worker thread: appends made while the new snapshot is
+    being built are carried over to the new journal.
+    Returns the bytes written, or 0 if there was nothing to do.
+    """
+    journal_path = journal_path_for(path)
+    with _lock:
+        preset = find_preset(read_snapshot(path), preset_name)
+        if preset is None:
+            return 0
+        journal_generation, offset = _replay(preset, journal_path)
+    if journal_generation is None:
+        return 0
+    generation = journal_generation + 1
+    text = _dump_snapshot(path, preset_name, preset, generation,
+                          base={"generation": journal_generation, "offset": offset})
+    with _lock:
+        current_generation, _ = _read_header_only(journal_path)
+        if current_generation != journal_generation:
+            # A full snapshot was written meanwhile, this compaction is stale
+            return 0
+        with open(journal_path, 'rb') as f:
+            f.seek(offset)
+            tail = f.read().decode('utf-8')
+        written = write_atomic(path, text)
+        written += write_atomic(journal_path, _journal_header(generation) + tail)
+        _generations[path] = (generation, None)
+        _digests[path] = _chain(_chain('', text), tail) if tail else _chain('', text)
+    return written
+
+# --- Banks ---
+DEFAULT_BANK = 'Preset1'
+INDEX_VERSION = 1
+# Parsed index with the (mtime, size) of the file it came from
+_index_cache = {}
+
+def banks_dir():
+    return os.path.join(ASSETS_DIR, 'banks')
+
+def index_path():
+    return os.path.join(banks_dir(), 'index.json')
+
+def legacy_base_path():
+    """Copy of the presets of prefs.json as they were last imported"""
+    return os.path.join(banks_dir(), 'legacy_base.json')
+
+def locked():
+    """The store lock, for callers that check a bank on disk and write it as one step"""
+    return _lock
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def read_index():
+    """Return the bank index, importing the legacy prefs.json the first time.
+
+    The parsed index is reused until the file changes on disk.
+    """
+    path = index_path()
+    with _lock:
+        key = _stat_key(path)
+        if key is not None and _index_cache.get('path') == path and _index_cache.get('key') == key:
+            return _index_cache['data']
+        try:
+            data = read_json(path) if key is not None else None
+        except ValueError:
+            data = None
+        if not isinstance(data, dict) or not data.get("banks"):
+            if READ_ONLY:
+                raise FileNotFoundError(f"No bank index at {path}. Start Blender with the add-on "
+                                        f"once to create it, or use a folder that has one.")
+            return _import_legacy()
+        _index_cache.update(path=path, key=key, data=data)
+        return data
+
+def write_index(data):
+    path = index_path()
+    with _lock:
+        written = write_atomic(path, json.dumps(data, indent=1, ensure_ascii=False))
+        _index_cache.update(path=path, key=_stat_key(path), data=data)
+    return written
+
+def _import_legacy():
+    """Create the index with one bank per preset of prefs.json"""
+    data = {"version": INDEX_VERSION, "active": None, "banks": []}
+    imported = {}
+    try:
+        legacy = read_json(PREFS_FILE, []) or []
+    except ValueError as e:
+        print(f"Could not import {PREFS_FILE}: {str(e)}")
+        legacy = []
+    for item in legacy:
+        if not isinstance(item, dict):
+            continue
+        for name in item:
+            preset = load_preset(name, PREFS_FILE)
+            if preset is not None and bank_entry(name, data) is None:
+                _add_bank(data, name, preset)
+                imported[name] = preset
+    if imported:
+        _write_legacy_base(imported)
+    else:
+        _add_bank(data, DEFAULT_BANK, {"Preference": {}, "ModSet": []})
+    data["active"] = data["banks"][0]["name"]
+    data["legacy"] = _stat_key(PREFS_FILE)
+    data["legacy_hash"] = _file_hash(PREFS_FILE)
+    write_index(data)
+    return data
+
+def _file_hash(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def legacy_changed():
+    """True when prefs.json changed since it was last imported"""
+    key = _stat_key(PREFS_FILE)
+    legacy = read_index().get("legacy")
+    return key is not None and list(key) != list(legacy or ())
+
+def read_legacy():
+    """Read prefs.json for a merge into the banks, without writing anything.
+
+    Safe to run on a worker thread. Returns {"key", "hash", "presets"}, where
+    presets maps names to preset dicts and is None when the content is the
+    same as when it was last imported.
+    """
+    key = _stat_key(PREFS_FILE)
+    content_hash = _file_hash(PREFS_FILE)
+    presets = None
+    if content_hash is not None and content_hash != read_index().get("legacy_hash"):
+        presets = {}
+        try:
+            data = read_json(PREFS_FILE, []) or []
+        except ValueError as e:
+            print(f"Could not import {PREFS_FILE}: {str(e)}")
+            data = []
+        for name in (name for item in data if isinstance(item, dict) for name in item):
+            preset = find_preset(data, name)
+            if isinstance(preset, dict):
+                with _lock:
+                    _replay(preset, journal_path_for(PREFS_FILE))
+                presets[name] = {"Preference": preset.get("Preference", {}), "ModSet": preset.get("ModSet", [])}
+    return {"key": key, "hash": content_hash, "presets": presets}
+
+def legacy_base(name):
+    """Preset name as prefs.json held it when it was last imported, None if unknown"""
+    try:
+        return find_preset(read_json(legacy_base_path(), []), name)
+    except ValueError:
+        return None
+
+def _write_legacy_base(presets):
+    write_atomic(legacy_base_path(), json.dumps([{name: preset} for name, preset in presets.items()],
+                                                separators=_JSON_COMPACT, ensure_ascii=False))
+
+def record_legacy(legacy):
+    """Remember the prefs.json read by read_legacy as imported.
+
+    Its presets become the base the next change of prefs.json is merged against.
+    """
+    with _lock:
+        if legacy["presets"] is not None:
+            _write_legacy_base(legacy["presets"])
+        data = read_index()
+        data["legacy"] = legacy["key"]
+        data["legacy_hash"] = legacy["hash"]
+        write_index(data)
+
+def import_json(path):
+    """Copy every preset of a prefs.json style file into the bank of the same name.
+
+    Returns the names of the banks that were written.
+    """
+    names = []
+    with _lock:
+        presets = [name for item in read_json(path, []) or [] if isinstance(item, dict) for name in item]
+        for name in presets:
+            preset = load_preset(name, path)
+            if preset is not None:
+                save_bank(name, preset)
+                names.append(name)
+        _generations.pop(path, None)
+    return names
+
+def export_json(name, path):
+    """Write a bank in the prefs.json layout, returns the bytes written"""
+    preset = load_bank(name)
+    if preset is None:
+        raise KeyError(name)
+    body = {"Preference": preset.get("Preference", {}), "ModSet": preset.get("ModSet", [])}
+    return write_atomic(path, json.dumps([{name: body}], indent=4, ensure_ascii=False))
+
+def _bank_filename(data, name):
+    stem = re.sub(r'[^\w\-]+', '_', name).strip('_') or 'bank'
+    used = {entry["file"] for entry in data["banks"]}
+    filename = stem + BANK_EXTENSION
+    n = 1
+    while filename in used or os.path.exists(os.path.join(banks_dir(), filename)):
+        n += 1
+        filename = f"{stem}_{n}{BANK_EXTENSION}"
+    return filename
+
+def _add_bank(data, name, preset):
+    entry = {"name": name, "file": _bank_filename(data, name), "count": 0, "checksum": ""}
+    path = os.path.join(banks_dir(), entry["file"])
+    write_snapshot(name, preset, path)
+    entry["count"] = len(preset.get("ModSet", []))
+    entry["checksum"] = _digests[path]
+    data["banks"].append(entry)
+    return entry
+
+def _update_entry(name, path, count=None):
+    """Store the current checksum (and count) of a bank in the index"""
+    data = read_index()
+    entry = bank_entry(name, data)
+    if entry is None:
+        return 0
+    if count is not None:
+        entry["count"] = count
+    entry["checksum"] = _digests.get(path, entry.get("checksum", ""))
+    return write_index(data)
+
+def bank_entry(name, data=None):
+    """Index entry {name, file, count, checksum} of a bank, or None"""
+    for entry in (data or read_index())["banks"]:
+        if entry["name"] == name:
+            return entry
+    return None
+
+def bank_path(name):
+    entry = bank_entry(name)
+    return None if entry is None else os.path.join(banks_dir(), entry["file"])
+
+def list_banks():
+    """(name, entry count) of every bank, read from the index only"""
+    return [(entry["name"], entry.get("count", 0)) for entry in read_index()["banks"]]
+
+def active_bank():
+    data = read_index()
+    if bank_entry(data.get("active"), data) is None:
+        return data["banks"][0]["name"]
+    return data["active"]
+
+def set_active_bank(name):
+    with _lock:
+        data = read_index()
+        if bank_entry(name, data) is None:
+            raise KeyError(name)
+        if data.get("active") == name:
+            return 0
+        data["active"] = name
+        return write_index(data)
+
+def load_bank(name):
+    """Load one bank, without reading any other bank. None if it does not exist."""
+    with _lock:
+        entry = bank_entry(name)
+        if entry is None:
+            return None
+        path = os.path.join(banks_dir(), entry["file"])
+        preset = load_preset(name, path)
+        _digests[path] = entry.get("checksum", "")
+    return preset
+
+def save_bank(name, preset):
+    """Replace the contents of a bank, creating it if needed. Returns the bytes written."""
+    with _lock:
+        data = read_index()
+        if bank_entry(name, data) is None:
+            _add_bank(data, name, preset)
+            return write_index(data)
+        path = bank_path(name)
+        written = write_snapshot(name, preset, path)
+        return written + _update_entry(name, path, len(preset.get("ModSet", [])))
+
+def append_bank_journal(name, records, count):
+    """Journal records for a bank that now holds count entries"""
+    if not records:
+        return 0
+    with _lock:
+        entry = bank_entry(name)
+        if entry is None:
+            raise KeyError(name)
+        path = os.path.join(banks_dir(), entry["file"])
+        _digests.setdefault(path, entry.get("checksum", ""))
+        written = append_journal(records, path)
+        return written + _update_entry(name, path, count)
+
+def bank_stat(name):
+    """(mtime, size) of a bank's snapshot and journal, cheap enough to call on every load"""
+    path = bank_path(name)
+    if path is None:
+        return None
+    return (_stat_key(path), _stat_key(journal_path_for(path)))
+
+def bank_content_hash(name):
+    """Hash of the bytes of a bank's snapshot and journal"""
+    path = bank_path(name)
+    digest = hashlib.sha1()
+    for file_path in (path, journal_path_for(path)) if path else ():
+        try:
+            with open(file_path, 'rb') as f:
+                digest.update(f.read())
+        except FileNotFoundError:
+            pass
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def bank_journal_size(name):
+    path = bank_path(name)
+    return journal_size(path) if path else 0
+
+def compact_bank(name):
+    path = bank_path(name)
+    if path is None:
+        return 0
+    written = compact(name, path)
+    if written:
+        with _lock:
+            written += _update_entry(name, path)
+    return written
+
+def create_bank(name, preference=None):
+    """Add an empty bank, raises ValueError if the name is taken"""
+    with _lock:
+        if not name or bank_entry(name) is not None:
+            raise ValueError(f"Bank '{name}' already exists" if name else "Bank name is empty")
+        return save_bank(name, {"Preference": dict(preference or {}), "ModSet": []})
+
+def rename_bank(name, new_name):
+    with _lock:
+        data = read_index()
+        entry = bank_entry(name, data)
+        if entry is None:
+            raise KeyError(name)
+        if not new_name or bank_entry(new_name, data) is not None:
+            raise ValueError(f"Bank '{new_name}' already exists" if new_name else "Bank name is empty")
+        path = os.path.join(banks_dir(), entry["file"])
+        preset = load_preset(name, path)
+        # The preset is stored under the bank name, so the snapshot is rewritten
+        written = write_snapshot(new_name, preset or {}, path)
+        entry["name"] = new_name
+        entry["checksum"] = _digests[path]
+        if data.get("active") == name:
+            data["active"] = new_name
+        return written + write_index(data)
+
+def delete_bank(name):
+    """Remove a bank and its files. The last bank can't be deleted."""
+    with _lock:
+        data = read_index()
+        entry = bank_entry(name, data)
+        if entry is None:
+            raise KeyError(name)
+        if len(data["banks"]) == 1:
+            raise ValueError("The last bank can't be deleted")
+        data["banks"].remove(entry)
+        if data.get("active") == name:
+            data["active"] = data["banks"][0]["name"]
+        # Drop the bank from the index first, a crash then only leaves stray files
+        write_index(data)
+        path = os.path.join(banks_dir(), entry["file"])
+        for file_path in (path, journal_path_for(path)):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+        _generations.pop(path, None)
+        _digests.pop(path, None)
+
+# --- Merging ---
+ENTRY_KEYS = container.ENTRY_KEYS
+parameters_key = container.parameters_key
+dump_parameters = container.dump_parameters
+
+def entry_values(entry):
+    """Tuple of the fields of a ModSet entry, Parameters as a canonical string.
+
+    Parameters captured in another key order compare equal, so banks saved
+    by older versions don't clash with their own re-saved copies.
+    """
+    parameters = entry.get("Parameters", {})
+    if not isinstance(parameters, str):
+        parameters = json.dumps(parameters, ensure_ascii=False)
+    return tuple(entry.get(key, "") for key in ENTRY_KEYS[:-1]) + (container.canonical_parameters(parameters)[1],)
+
+def _hunks(base, other, side):
+    """(start, end, replacement, side) for each range of base that other changed"""
+    matcher = difflib.SequenceMatcher(None, base, other, autojunk=False)
+    return [(i1, i2, other[j1:j2], side)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+def _apply_hunks(base, start, end, hunks):
+    result = []
+    pos = start
+    for i1, i2, replacement, _ in hunks:
+        result.extend(base[pos:i1])
+        result.extend(replacement)
+        pos = i2
+    result.extend(base[pos:end])
+    return result
+
+def merge_presets(base, local, remote):
+    """Three-way merge of preset dicts, returns (merged preset, conflicts).
+
+    Entries changed on one side only since base are taken from that side.
+    Entries both sides inserted at the same place are all kept, local ones
+    first. Where both sides changed overlapping entries differently the
+    local version wins and the remote version of those entries is added to
+    conflicts. Preferences are taken from local if it changed them.
+    """
+    b = [entry_values(e) for e in base.get("ModSet", [])]
+    l = [entry_values(e) for e in local.get("ModSet", [])]
+    r = [entry_values(e) for e in remote.get("ModSet", [])]
+    hunks = sorted(_hunks(b, l, 'local') + _hunks(b, r, 'remote'), key=lambda h: (h[0], h[1]))
+    merged = []
+    conflicts = []
+    pos = 0
+    i = 0
+    while i < len(hunks):
+        # Group the hunks that touch the same base entries
+        start, end = hunks[i][0], hunks[i][1]
+        group = [hunks[i]]
+        i += 1
+        while i < len(hunks) and (hunks[i][0] < end or hunks[i][0] == start):
+            end = max(end, hunks[i][1])
+            group.append(hunks[i])
+            i += 1
+        merged.extend(b[pos:start])
+        pos = end
+        # Inserts before the group's first entry don't touch any base entry
+        inserts = {h[3]: h[2] for h in group if h[0] == h[1] == start}
+        local_inserts = inserts.get('local', [])
+        merged.extend(local_inserts)
+        merged.extend(e for e in inserts.get('remote', []) if e not in local_inserts)
+        group = [h for h in group if h[0] != h[1] or h[0] != start]
+        if not group:
+            continue
+        local_part = _apply_hunks(b, start, end, [h for h in group if h[3] == 'local'])
+        remote_part = _apply_hunks(b, start, end, [h for h in group if h[3] == 'remote'])
+        if all(h[3] == 'remote' for h in group):
+            merged.extend(remote_part)
+        else:
+            merged.extend(local_part)
+            if any(h[3] == 'remote' for h in group) and local_part != remote_part:
+                conflicts.append(remote_part)
+    merged.extend(b[pos:])
+    base_prefs = base.get("Preference", {})
+    preference = local.get("Preference", {})
+    if preference == base_prefs:
+        preference = remote.get("Preference", {})
+    return ({"Preference": dict(preference), "ModSet": [dict(zip(ENTRY_KEYS, e)) for e in merged]},
+            [[dict(zip(ENTRY_KEYS, e)) for e in part] for part in conflicts])
+
+def same_presets(a, b):
+    """True when two preset dicts hold the same entries and preferences"""
+    return ([entry_values(e) for e in a.get("ModSet", [])] == [entry_values(e) for e in b.get("ModSet", [])]
+            and a.get("Preference", {}) == b.get("Preference", {}))
+
+def plan_legacy_merge(legacy):
+    """Merge each preset read by read_legacy into its bank, without writing anything.
+
+    Safe to run on a worker thread. Each bank is merged three ways against
+    prefs.json as it was last imported, so entries only the bank has are
+    kept. Without that copy the entries of both are kept. Returns
+    one dict per preset: name, the bank's stat when it was read, remote,
+    merged, conflicts and whether merged differs from the bank.
+    """
+    plans = []
+    for name, remote in (legacy["presets"] or {}).items():
+        base = legacy_base(name) or {"Preference": {}, "ModSet": []}
+        with _lock:
+            stat = bank_stat(name)
+            local = load_bank(name)
+        if local is None:
+            merged, conflicts, changed = remote, [], True
+        else:
+            merged, conflicts = merge_presets(base, local, remote)
+            changed = not same_presets(merged, local)
+        plans.append({"name": name, "stat": stat, "remote": remote, "merged": merged,
+                      "conflicts": conflicts, "changed": changed})
+    return plans
@@ -16,24 +16,161 @@ import os
 import json
 import math
 import mathutils
+import threading
+from types import MappingProxyType
+from collections import OrderedDict
+from contextlib import contextmanager
+from bpy.app.handlers import persistent
+from . import store, profiling
 
 # --- Global Variables ---
 keymaps = {}
 _icons = None
-ui_data = {'values': []}
+# Icon name -> icon value, built once in register()
+_icon_values = {}
+
+# Seconds to wait before writing, so bursts of edits become one write
+SAVE_DELAY = 0.5
+# 'synced' is True while wm.modset_preset matches the store on disk, so
+# changes can be journaled. Otherwise the next change writes a full snapshot.
+_save_state = {
+    'dirty': False,
+    'snapshot': False,
+    'synced': False,
+    'muted': 0,
+    'pending': [],
+    'compacting': False,
+}
+# The bank wm.modset_preset was last loaded from or written to, with the
+# (mtime, size) and content hash of its files at that point. A hash of None
+# means the files were written by us and only the stat is known. 'base' is
+# the bank content at that point, the common ancestor for merging.
+_loaded_bank = {'wm': 0, 'name': None, 'stat': None, 'hash': None, 'base': None}
+
+# Seconds between checks for bank files changed by other programs. The
+# interval grows while nothing changes.
+WATCH_MIN_INTERVAL = 1.0
+WATCH_MAX_INTERVAL = 8.0
+# 'compacted' is the bank stat and hash a finished compaction left, see _compact_worker
+_watch_state = {'interval': WATCH_MIN_INTERVAL, 'reading': False, 'result': None, 'compacted': None}
 
 # --- Utility Functions ---
 def str_to_int(val):
     """Convert string to integer if possible, otherwise return 0"""
     return int(val) if val.isdigit() else 0
 
+def build_icon_table():
+    """Fill the icon name -> icon value table from Blender's icon enum"""
+    enum_items = bpy.types.UILayout.bl_rna.functions["prop"].parameters["icon"].enum_items
+    _icon_values.clear()
+    _icon_values.update((item.identifier, item.value) for item in enum_items)
+    _icon_index.clear()
+    _icon_search_cache.clear()
+
 def str_to_icon(val):
     """Convert icon name to Blender internal icon value"""
-    enum_items = bpy.types.UILayout.bl_rna.functions["prop"].parameters["icon"].enum_items
-    if val in enum_items:
-        return enum_items[val].value
+    if not _icon_values:
+        build_icon_table()
+    value = _icon_values.get(val)
+    if value is not None:
+        return value
     return str_to_int(val)
 
+# --- Icon Picker Index ---
+# Built on first use from the icon table: icon names and values in enum
+# order, a token -> icon indices map for prefix search, and icon indices
+# per category (the first token of the name, small groups go to MISC).
+ICON_PAGE_SIZE = 200
+ICON_SEARCH_CACHE_SIZE = 32
+_icon_index = {}
+_icon_search_cache = OrderedDict()
+_icon_category_items = []
+
+def get_icon_index():
+    if _icon_index:
+        return _icon_index
+    if not _icon_values:
+        build_icon_table()
+    names = [name for name in _icon_values if name != 'NONE']
+    tokens = {}
+    groups = {}
+    for i, name in enumerate(names):
+        parts = name.lower().split('_')
+        for part in parts:
+            tokens.setdefault(part, []).append(i)
+        groups.setdefault(parts[0].upper(), []).append(i)
+    categories = {'MISC': []}
+    for group, indices in groups.items():
+        if len(indices) >= 8:
+            categories[group] = indices
+        else:
+            categories['MISC'].extend(indices)
+    categories['MISC'].sort()
+    _icon_index.update(
+        names=names,
+        lower_names=[name.lower() for name in names],
+        values=[_icon_values[name] for name in names],
+        tokens=tokens,
+        categories=categories,
+    )
+    return _icon_index
+
+def icon_category_items(self, context):
+    # Blender needs the item list to stay referenced, so it is kept globally
+    if not _icon_category_items:
+        index = get_icon_index()
+        _icon_category_items.append(('ALL', 'All', 'All icons'))
+        for group in sorted(index['categories']):
+            count = len(index['categories'][group])
+            _icon_category_items.append((group, group.title(), f'{count} icons'))
+    return _icon_category_items
+
+def rank_matches(tokens, lower_names, candidates, query, separator):
+    """Indices of candidates matching query, best matches first.
+
+    tokens maps each lowercase word to the indices whose name has it, and
+    separator joins the words of a name in lower_names.
+    """
+    terms = query.lower().replace('_', ' ').split()
+    if not terms:
+        return tuple(candidates)
+    prefix_hits = None
+    for term in terms:
+        hits = set()
+        for token, indices in tokens.items():
+            if token.startswith(term):
+                hits.update(indices)
+        prefix_hits = hits if prefix_hits is None else prefix_hits & hits
+    needle = separator.join(terms)
+    first = [i for i in candidates if i in prefix_hits]
+    rest = [i for i in candidates if i not in prefix_hits and needle in lower_names[i]]
+    return tuple(first + rest)
+
+def search_icons(query, category='ALL'):
+    """Return the indices of the icons matching query within category.
+
+    Icons where every word of the query starts a word of the icon name come
+    first, followed by the other icons that contain the query as a substring.
+    """
+    key = (query, category)
+    result = _icon_search_cache.get(key)
+    if result is not None:
+        _icon_search_cache.move_to_end(key)
+        return result
+    index = get_icon_index()
+    if category == 'ALL' or category not in index['categories']:
+        candidates = range(len(index['names']))
+    else:
+        candidates = index['categories'][category]
+    result = rank_matches(index['tokens'], index['lower_names'], candidates, query, '_')
+    _icon_search_cache[key] = result
+    if len(_icon_search_cache) > ICON_SEARCH_CACHE_SIZE:
+        _icon_search_cache.popitem(last=False)
+    return result
+
+def update_icon_filter(self, context):
+    self.modset_icon_page = 0
+
 def check_prop(prop_path, glob, loc):
     """Safely check if a property exists using eval"""
     try:
@@ -45,145 +182,889 @@ def check_prop(prop_path, glob, loc):
 # --- Update Callback Functions ---
 def update_colnum(self, context):
     _ = self.columnnumber
-    bpy.ops.modset.autosave('INVOKE_DEFAULT')
+    record_prefs_change()
 
 def update_show_name(self, context):
     _ = self.showmodname
-    bpy.ops.modset.autosave('INVOKE_DEFAULT')
+    record_prefs_change()
 
 def update_show_preset(self, context):
     _ = self.sna_show_preset
-    bpy.ops.modset.autosave('INVOKE_DEFAULT')
+    record_prefs_change()
 
 def update_show_icon(self, context):
     _ = self.showmodicon
-    bpy.ops.modset.autosave('INVOKE_DEFAULT')
+    record_prefs_change()
+
+def update_modname(self, context):
+    record_item_change(self, "Name", self.modname)
+
+def update_modicon(self, context):
+    self.iconvalue = str_to_icon(self.modicon)
+    record_item_change(self, "Icon", self.modicon)
+
+def refresh_icon_values():
+    """Resolve the cached icon value of every preset item again.
+
+    Icon values are enum indices that can differ between Blender versions,
+    so they are never taken from a bank file.
+    """
+    for wm in bpy.data.window_managers:
+        for item in wm.modset_preset:
+            value = str_to_icon(item.modicon)
+            if item.iconvalue != value:
+                item.iconvalue = value
+
+# Modifier type -> icon name
+MOD_ICONS = {
+    'DATA_TRANSFER': 'MOD_DATA_TRANSFER',
+    'MESH_CACHE': 'MOD_MESHDEFORM',
+    'MESH_SEQUENCE_CACHE': 'MOD_MESHDEFORM',
+    'NORMAL_EDIT': 'MOD_NORMALEDIT',
+    'WEIGHTED_NORMAL': 'MOD_NORMALEDIT',
+    'UV_PROJECT': 'MOD_UVPROJECT',
+    'UV_WARP': 'MOD_UVPROJECT',
+    'VERTEX_WEIGHT_EDIT': 'MOD_VERTEX_WEIGHT',
+    'VERTEX_WEIGHT_MIX': 'MOD_VERTEX_WEIGHT',
+    'VERTEX_WEIGHT_PROXIMITY': 'MOD_VERTEX_WEIGHT',
+    'ARRAY': 'MOD_ARRAY',
+    'BEVEL': 'MOD_BEVEL',
+    'BOOLEAN': 'MOD_BOOLEAN',
+    'BUILD': 'MOD_BUILD',
+    'DECIMATE': 'MOD_DECIM',
+    'EDGE_SPLIT': 'MOD_EDGESPLIT',
+    'NODES': 'GEOMETRY_NODES',
+    'MASK': 'MOD_MASK',
+    'MIRROR': 'MOD_MIRROR',
+    'MESH_TO_VOLUME': 'VOLUME_DATA',
+    'MULTIRES': 'MOD_MULTIRES',
+    'REMESH': 'MOD_REMESH',
+    'SCREW': 'MOD_SCREW',
+    'SKIN': 'MOD_SKIN',
+    'SOLIDIFY': 'MOD_SOLIDIFY',
+    'SUBSURF': 'MOD_SUBSURF',
+    'TRIANGULATE': 'MOD_TRIANGULATE',
+    'VOLUME_TO_MESH': 'VOLUME_DATA',
+    'WELD': 'AUTOMERGE_OFF',
+    'WIREFRAME': 'MOD_WIREFRAME',
+    'ARMATURE': 'MOD_ARMATURE',
+    'CAST': 'MOD_CAST',
+    'CURVE': 'MOD_CURVE',
+    'DISPLACE': 'MOD_DISPLACE',
+    'HOOK': 'HOOK',
+    'LAPLACIANDEFORM': 'MOD_MESHDEFORM',
+    'LATTICE': 'MOD_LATTICE',
+    'MESH_DEFORM': 'MOD_MESHDEFORM',
+    'SHRINKWRAP': 'MOD_SHRINKWRAP',
+    'SIMPLE_DEFORM': 'MOD_SIMPLEDEFORM',
+    'SMOOTH': 'MOD_SMOOTH',
+    'CORRECTIVE_SMOOTH': 'MOD_SMOOTH',
+    'LAPLACIANSMOOTH': 'MOD_SMOOTH',
+    'SURFACE_DEFORM': 'MOD_MESHDEFORM',
+    'WARP': 'MOD_WARP',
+    'WAVE': 'MOD_WAVE',
+    'VOLUME_DISPLACE': 'VOLUME_DATA',
+    'CLOTH': 'MOD_CLOTH',
+    'COLLISION': 'MOD_PHYSICS',
+    'DYNAMIC_PAINT': 'MOD_DYNAMICPAINT',
+    'EXPLODE': 'MOD_EXPLODE',
+    'FLUID': 'MOD_FLUIDSIM',
+    'OCEAN': 'MOD_OCEAN',
+    'PARTICLE_INSTANCE': 'MOD_PARTICLE_INSTANCE',
+    'PARTICLE_SYSTEM': 'MOD_PARTICLES',
+    'SOFT_BODY': 'MOD_SOFT',
+    'SURFACE': 'OUTLINER_OB_SURFACE',
+}
 
 def get_mod_icon(val):
-    mapping = {
-        'DATA_TRANSFER': 'MOD_DATA_TRANSFER',
-        'MESH_CACHE': 'MOD_MESHDEFORM',
-        'MESH_SEQUENCE_CACHE': 'MOD_MESHDEFORM',
-        'NORMAL_EDIT': 'MOD_NORMALEDIT',
-        'WEIGHTED_NORMAL': 'MOD_NORMALEDIT',
-        'UV_PROJECT': 'MOD_UVPROJECT',
-        'UV_WARP': 'MOD_UVPROJECT',
-        'VERTEX_WEIGHT_EDIT': 'MOD_VERTEX_WEIGHT',
-        'VERTEX_WEIGHT_MIX': 'MOD_VERTEX_WEIGHT',
-        'VERTEX_WEIGHT_PROXIMITY': 'MOD_VERTEX_WEIGHT',
-        'ARRAY': 'MOD_ARRAY',
-        'BEVEL': 'MOD_BEVEL',
-        'BOOLEAN': 'MOD_BOOLEAN',
-        'BUILD': 'MOD_BUILD',
-        'DECIMATE': 'MOD_DECIM',
-        'EDGE_SPLIT': 'MOD_EDGESPLIT',
-        'NODES': 'GEOMETRY_NODES',
-        'MASK': 'MOD_MASK',
-        'MIRROR': 'MOD_MIRROR',
-        'MESH_TO_VOLUME': 'VOLUME_DATA',
-        'MULTIRES': 'MOD_MULTIRES',
-        'REMESH': 'MOD_REMESH',
-        'SCREW': 'MOD_SCREW',
-        'SKIN': 'MOD_SKIN',
-        'SOLIDIFY': 'MOD_SOLIDIFY',
-        'SUBSURF': 'MOD_SUBSURF',
-        'TRIANGULATE': 'MOD_TRIANGULATE',
-        'VOLUME_TO_MESH': 'VOLUME_DATA',
-        'WELD': 'AUTOMERGE_OFF',
-        'WIREFRAME': 'MOD_WIREFRAME',
-        'ARMATURE': 'MOD_ARMATURE',
-        'CAST': 'MOD_CAST',
-        'CURVE': 'MOD_CURVE',
-        'DISPLACE': 'MOD_DISPLACE',
-        'HOOK': 'HOOK',
-        'LAPLACIANDEFORM': 'MOD_MESHDEFORM',
-        'LATTICE': 'MOD_LATTICE',
-        'MESH_DEFORM': 'MOD_MESHDEFORM',
-        'SHRINKWRAP': 'MOD_SHRINKWRAP',
-        'SIMPLE_DEFORM': 'MOD_SIMPLEDEFORM',
-        'SMOOTH': 'MOD_SMOOTH',
-        'CORRECTIVE_SMOOTH': 'MOD_SMOOTH',
-        'LAPLACIANSMOOTH': 'MOD_SMOOTH',
-        'SURFACE_DEFORM': 'MOD_MESHDEFORM',
-        'WARP': 'MOD_WARP',
-        'WAVE': 'MOD_WAVE',
-        'VOLUME_DISPLACE': 'VOLUME_DATA',
-        'CLOTH': 'MOD_CLOTH',
-        'COLLISION': 'MOD_PHYSICS',
-        'DYNAMIC_PAINT': 'MOD_DYNAMICPAINT',
-        'EXPLODE': 'MOD_EXPLODE',
-        'FLUID': 'MOD_FLUIDSIM',
-        'OCEAN': 'MOD_OCEAN',
-        'PARTICLE_INSTANCE': 'MOD_PARTICLE_INSTANCE',
-        'PARTICLE_SYSTEM': 'MOD_PARTICLES',
-        'SOFT_BODY': 'MOD_SOFT',
-        'SURFACE': 'OUTLINER_OB_SURFACE',
+    return MOD_ICONS.get(val, '')
+
+# Collection item attribute -> bank entry key, in store.ENTRY_KEYS order
+ITEM_FIELDS = (
+    ("modname", "Name"),
+    ("modtype", "Type"),
+    ("modicon", "Icon"),
+    ("modpath", "Path"),
+    ("aseetlib", "AssetLibrary"),
+    ("parameters", "Parameters"),
+)
+
+def preset_to_dict(item):
+    """Convert a ModSet collection item to its prefs.json entry"""
+    return {
+        "Name": item.modname,
+        "Type": item.modtype,
+        "Icon": item.modicon,
+        "Path": item.modpath,
+        "AssetLibrary": item.aseetlib,
+        "Parameters": item.parameters
     }
-    return mapping.get(val, '')
-
-def add_to_ui_list(item):
-    # Add parameters to ui_data['values']
-    ui_data['values'].append([
-        item.modname,
-        item.modtype,
-        item.modicon,
-        item.modpath,
-        item.aseetlib,
-        item.parameters
-    ])
-
-def draw_add_button(layout_func):
+
+def fill_item(item, entry):
+    """Set the fields of a ModSet collection item from a prefs.json entry"""
+    for attr, key in ITEM_FIELDS:
+        setattr(item, attr, entry.get(key, ""))
+
+def _entry_kind(values):
+    # Type, Path and AssetLibrary: the modifier an entry adds
+    return values[1], values[3], values[4]
+
+def _increasing_run(values):
+    """Set of the values forming a longest increasing subsequence"""
+    tails = []
+    tail_pos = []
+    parent = [-1] * len(values)
+    for i, value in enumerate(values):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tails[mid] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo:
+            parent[i] = tail_pos[lo - 1]
+        if lo == len(tails):
+            tails.append(value)
+            tail_pos.append(i)
+        else:
+            tails[lo] = value
+            tail_pos[lo] = i
+    run = set()
+    i = tail_pos[-1] if tail_pos else -1
+    while i >= 0:
+        run.add(values[i])
+        i = parent[i]
+    return run
+
+def patch_presets(collection, entries):
+    """Make collection match the bank entries with as few edits as possible.
+
+    Common leading and trailing entries are left alone. In between, items are
+    matched to entries with the same values first, then to entries of the same
+    modifier; unmatched items are removed, the rest moved into place and
+    updated, and new items added. Returns the number of edits.
+    """
+    current = [tuple(getattr(item, attr) for attr, _ in ITEM_FIELDS) for item in collection]
+    target = [store.entry_values(entry) for entry in entries]
+    start = 0
+    while start < len(current) and start < len(target) and current[start] == target[start]:
+        start += 1
+    end_cur, end_tgt = len(current), len(target)
+    while end_cur > start and end_tgt > start and current[end_cur - 1] == target[end_tgt - 1]:
+        end_cur -= 1
+        end_tgt -= 1
+    if start == end_cur == end_tgt:
+        return 0
+
+    # Match the window: exact values first, then same type and asset
+    by_values = {}
+    by_kind = {}
+    for k in range(start, end_cur):
+        by_values.setdefault(current[k], []).append(k)
+        by_kind.setdefault(_entry_kind(current[k]), []).append(k)
+    match = [None] * (end_tgt - start)
+    used = set()
+    for i in range(start, end_tgt):
+        for k in by_values.get(target[i], ()):
+            if k not in used:
+                match[i - start] = k
+                used.add(k)
+                break
+    for i in range(start, end_tgt):
+        if match[i - start] is None:
+            for k in by_kind.get(_entry_kind(target[i]), ()):
+                if k not in used:
+                    match[i - start] = k
+                    used.add(k)
+                    break
+
+    edits = 0
+    for k in range(end_cur - 1, start - 1, -1):
+        if k not in used:
+            collection.remove(k)
+            edits += 1
+    # Items already in the right relative order stay where they are, every
+    # other one is moved once to just after the entry that precedes it
+    keep = _increasing_run([k for k in match if k is not None])
+    tokens = [k if k is not None else ('new', i) for i, k in enumerate(match)]
+    order = [k for k in range(start, end_cur) if k in used]
+    for i, token in enumerate(tokens):
+        if token in keep:
+            continue
+        if match[i] is None:
+            collection.add()
+            pos = len(collection) - 1 - start
+        else:
+            pos = order.index(token)
+            order.pop(pos)
+        dest = order.index(tokens[i - 1]) + 1 if i else 0
+        order.insert(dest, token)
+        if pos != dest:
+            collection.move(start + pos, start + dest)
+        edits += 1
+    for i, k in enumerate(match):
+        values = target[start + i]
+        if k is None or current[k] != values:
+            item = collection[start + i]
+            for (attr, _), value in zip(ITEM_FIELDS, values):
+                if getattr(item, attr) != value:
+                    setattr(item, attr, value)
+            if k is not None:
+                edits += 1
+    return edits
+
+# --- Draw State ---
+# What draw_mod_panel needs beyond plain attribute reads, kept between
+# redraws. The library part (preset button labels and icons, display
+# settings) is dropped whenever presets or settings change. The context
+# part (active object and modifier) is dropped by depsgraph updates and
+# msgbus notifications.
+DRAW_ICONS = (
+    'NONE', 'DOWNARROW_HLT', 'RIGHTARROW', 'SETTINGS', 'ADD', 'TRASH',
+    'SORT_DESC', 'SORT_ASC', 'BACK', 'FORWARD', 'FILE_REFRESH'
+)
+_draw_state = {'library_valid': False, 'context_valid': False}
+_msgbus_owner = object()
+
+def invalidate_draw_state(library=True, context=True):
+    if library:
+        _draw_state['library_valid'] = False
+    if context:
+        _draw_state['context_valid'] = False
+
+# Preset buttons drawn per page, and the library size from which the
+# search row is shown
+BUTTON_PAGE_SIZE = 60
+BUTTON_FILTER_MIN = 20
+BUTTON_SEARCH_CACHE_SIZE = 16
+# Buttons in the strip of recently used presets
+RECENT_SIZE = 6
+_button_search_cache = OrderedDict()
+# Tag filter items with the (tag, count) pairs they were built from
+_button_tag_items = {}
+# preset_key -> times used this session, the most recently used last
+_preset_usage = OrderedDict()
+
+def split_tags(name):
+    """Split '#tag' words off a preset name, returns (label, lowercase tags)"""
+    words = name.split()
+    tags = [word[1:].lower() for word in words if word.startswith('#') and len(word) > 1]
+    if not tags:
+        return name, tags
+    return ' '.join(word for word in words if not (word.startswith('#') and len(word) > 1)), tags
+
+def preset_key(item):
+    return item.modname, item.modtype, item.modpath, item.aseetlib
+
+def search_presets(state, query, tag='ALL'):
+    """Indices of the preset buttons matching query and tag, see rank_matches"""
+    key = (query, tag)
+    result = _button_search_cache.get(key)
+    if result is not None:
+        _button_search_cache.move_to_end(key)
+        return result
+    candidates = state['tags'].get(tag) if tag != 'ALL' else None
+    if candidates is None:
+        candidates = range(len(state['buttons']))
+    result = rank_matches(state['tokens'], state['lower_names'], candidates, query, ' ')
+    _button_search_cache[key] = result
+    if len(_button_search_cache) > BUTTON_SEARCH_CACHE_SIZE:
+        _button_search_cache.popitem(last=False)
+    return result
+
+def button_tag_items(self, context):
+    # Blender keeps pointers into the strings of the last list it got, so
+    # the list is kept globally and only rebuilt when the tags change
+    state = get_draw_state(context)
+    counts = tuple(sorted((tag, len(indices)) for tag, indices in state['tags'].items()))
+    if _button_tag_items.get('key') != counts:
+        _button_tag_items.update(key=counts, items=[('ALL', 'All', 'All presets')] + [
+            (tag.upper(), tag.title(), f'{count} presets') for tag, count in counts
+        ])
+    return _button_tag_items['items']
+
+def update_button_filter(self, context):
+    self.modset_page = 0
+
+def record_preset_use(item):
+    key = preset_key(item)
+    _preset_usage[key] = _preset_usage.pop(key, 0) + 1
+    while len(_preset_usage) > RECENT_SIZE * 8:
+        _preset_usage.popitem(last=False)
+
+def recent_buttons(state):
+    """Indices of the recently used presets, the most used first"""
+    recent = []
+    for key in reversed(_preset_usage):
+        index = state['keys'].get(key)
+        if index is not None:
+            recent.append((_preset_usage[key], index))
+            if len(recent) == RECENT_SIZE:
+                break
+    recent.sort(key=lambda pair: -pair[0])
+    return [index for _, index in recent]
+
+def visible_buttons(wm, state):
+    """(indices on the current page, page, page count, matches) of the preset grid"""
+    tag = wm.modset_tag
+    if tag != 'ALL':
+        tag = tag.lower()
+    matches = search_presets(state, wm.modset_search, tag)
+    page_count = max(1, -(-len(matches) // BUTTON_PAGE_SIZE))
+    page = min(wm.modset_page, page_count - 1)
+    return matches[page * BUTTON_PAGE_SIZE:(page + 1) * BUTTON_PAGE_SIZE], page, page_count, len(matches)
+
+def _build_library_state(wm):
+    state = _draw_state
+    state['wm'] = wm.as_pointer()
+    state['count'] = len(wm.modset_preset)
+    state['icons'] = {name: str_to_icon(name) for name in DRAW_ICONS}
+    if len(wm.modset_prefs):
+        prefs = wm.modset_prefs[0]
+        state['columns'] = prefs.columnnumber
+        state['bank'] = prefs.presetname
+        show_name = prefs.showmodname
+        show_icon = prefs.showmodicon
+    else:
+        state['columns'] = 2
+        state['bank'] = ''
+        show_name, show_icon = True, False
+    none_icon = state['icons']['NONE']
+    buttons = []
+    lower_names = []
+    tokens = {}
+    tags = {}
+    keys = {}
+    for i, item in enumerate(wm.modset_preset):
+        label, item_tags = split_tags(item.modname)
+        buttons.append((label if show_name else '', item.iconvalue if show_icon else none_icon))
+        lower_names.append(label.lower())
+        if item.modtype:
+            # Geometry nodes presets from a library have no type
+            item_tags.append(item.modtype.lower())
+        for word in label.lower().replace('_', ' ').split() + item_tags:
+            tokens.setdefault(word, []).append(i)
+        for tag in item_tags:
+            tags.setdefault(tag, []).append(i)
+        keys.setdefault(preset_key(item), i)
+    state['buttons'] = tuple(buttons)
+    state['lower_names'] = lower_names
+    state['tokens'] = tokens
+    state['tags'] = tags
+    state['keys'] = keys
+    _button_search_cache.clear()
+    state['library_valid'] = True
+
+def _build_context_state(obj):
+    state = _draw_state
+    state['object'] = obj.as_pointer() if obj is not None else 0
+    modifiers = getattr(obj, 'modifiers', None)
+    state['has_active_modifier'] = modifiers is not None and modifiers.active is not None
+    state['has_modifiers'] = modifiers is not None and len(modifiers) > 0
+    state['context_valid'] = True
+
+def get_draw_state(context):
+    """Return the draw state for context, rebuilding the parts that are stale"""
+    state = _draw_state
+    wm = context.window_manager
+    if (not state['library_valid'] or state['wm'] != wm.as_pointer()
+            or state['count'] != len(wm.modset_preset)):
+        _build_library_state(wm)
+    obj = context.object
+    if not state['context_valid'] or state['object'] != (obj.as_pointer() if obj is not None else 0):
+        _build_context_state(obj)
+    return state
+
+def _on_active_changed(*args):
+    invalidate_draw_state(library=False)
+
+def subscribe_draw_state():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    for key in ((bpy.types.LayerObjects, "active"), (bpy.types.ObjectModifiers, "active")):
+        bpy.msgbus.subscribe_rna(key=key, owner=_msgbus_owner, args=(), notify=_on_active_changed)
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph=None):
+    invalidate_draw_state(library=False)
+
+def draw_add_button(layout_func, state):
     row = layout_func.row(align=True)
     row.scale_y = 1.8
-    row.enabled = check_prop("bpy.context.object.modifiers.active.type", globals(), locals())
-    row.active = check_prop("bpy.context.object.modifiers.active.type", globals(), locals())
-    op = row.operator('modset.add_selected', text='Add Selected', icon_value=str_to_icon('ADD'), emboss=True)
-
-def save_preset_json(preset_name):
-    file_path = os.path.join(os.path.dirname(__file__), 'assets', 'prefs.json')
-    template_vals = ui_data['values']
-    prefs = bpy.context.scene.modset_prefs[0]
-    pref_data = {
+    row.enabled = state['has_active_modifier']
+    row.active = state['has_active_modifier']
+    row.operator('modset.add_selected', text='Add Selected', icon_value=state['icons']['ADD'], emboss=True)
+    sub = row.row(align=True)
+    sub.enabled = state['has_modifiers']
+    sub.operator('modset.add_stack', text='Add Stack', icon='MODIFIER', emboss=True)
+
+def draw_bank_row(layout_func, state, setting):
+    row = layout_func.row(align=True)
+    row.operator_menu_enum('modset.switch_bank', 'bank', text=state['bank'], icon='PRESET')
+    if setting:
+        row.operator('modset.new_bank', text='', icon_value=state['icons']['ADD'], emboss=True)
+        row.operator('modset.rename_bank', text='', icon='GREASEPENCIL', emboss=True)
+        sub = row.row(align=True)
+        sub.alert = True
+        sub.operator('modset.delete_bank', text='', icon_value=state['icons']['TRASH'], emboss=True)
+
+def prefs_to_dict(wm):
+    prefs = wm.modset_prefs[0]
+    return {
         "column_number": prefs.columnnumber,
         "show_mod_icon": prefs.showmodicon,
         "show_mod_name": prefs.showmodname,
-        "show_preset": bpy.context.scene.sna_show_preset
+        "show_preset": wm.sna_show_preset
     }
-    
-    keys = ["Name", "Type", "Icon", "Path", "AssetLibrary", "Parameters"]
-    preset_data = [dict(zip(keys, vals)) for vals in template_vals]
-    data = {preset_name: {"Preference": pref_data, "ModSet": preset_data}}
+
+def library_preset(wm):
+    """The presets and settings of the session library as a bank preset dict"""
+    return {"Preference": prefs_to_dict(wm), "ModSet": [preset_to_dict(item) for item in wm.modset_preset]}
+
+def apply_preference(wm, p_data):
+    prefs = wm.modset_prefs[0]
+    prefs.columnnumber = p_data.get("column_number", 2)
+    prefs.showmodicon = p_data.get("show_mod_icon", True)
+    prefs.showmodname = p_data.get("show_mod_name", True)
+    wm.sna_show_preset = p_data.get("show_preset", False)
+
+# --- Banks ---
+# Bank menu items with the (name, count) pairs they were built from
+_bank_items = {}
+
+def current_bank(wm):
+    """Name of the bank the session library holds, the store's active bank by default"""
+    if len(wm.modset_prefs):
+        name = wm.modset_prefs[0].presetname
+        if store.bank_entry(name) is not None:
+            return name
+    return store.active_bank()
+
+def bank_items(self, context):
+    # Kept globally and only rebuilt when the banks change, see button_tag_items
+    banks = tuple(store.list_banks())
+    if _bank_items.get('key') != banks:
+        _bank_items.update(key=banks, items=[(name, name, f'{count} presets') for name, count in banks])
+    return _bank_items['items']
+
+def _bank_is_loaded(wm, name, stat):
+    return (_save_state['synced'] and _loaded_bank['wm'] == wm.as_pointer()
+            and _loaded_bank['name'] == name and _loaded_bank['stat'] == stat)
+
+def _remember_bank(wm, name, stat, content_hash=None, base=None):
+    _loaded_bank.update(wm=wm.as_pointer(), name=name, stat=stat, hash=content_hash)
+    if base is not None:
+        _loaded_bank['base'] = base
+
+@profiling.timed('load_bank')
+def load_bank(wm, name=None):
+    """Make wm.modset_preset match one bank, the current one by default.
+
+    Pending changes are written first so they are part of what is loaded.
+    Nothing is read when the bank files kept their mtime and size since the
+    library was last synced with them, and nothing is parsed when only their
+    timestamps changed. Otherwise the collection is patched, not rebuilt.
+    Returns False when the bank does not exist.
+    """
+    flush_save()
+    with store.locked():
+        _take_compaction(wm)
+    name = name or current_bank(wm)
+    stat = store.bank_stat(name)
+    if stat is not None and len(wm.modset_prefs) and _bank_is_loaded(wm, name, stat):
+        return True
+    content_hash = store.bank_content_hash(name) if stat is not None else None
+    if (content_hash is not None and content_hash == _loaded_bank['hash']
+            and len(wm.modset_prefs) and _bank_is_loaded(wm, name, _loaded_bank['stat'])):
+        _loaded_bank['stat'] = stat
+        return True
+    preset_data = store.load_bank(name) if stat is not None else None
+    with muted_changes():
+        if not len(wm.modset_prefs):
+            wm.modset_prefs.add()
+        if preset_data is not None:
+            patch_presets(wm.modset_preset, preset_data.get("ModSet", []))
+            wm.modset_prefs[0].presetname = name
+            apply_preference(wm, preset_data.get("Preference", {}))
+    if preset_data is None:
+        print(f"Error: Preset bank '{name}' not found.")
+        mark_synced(False)
+        return False
+    if wm.modset_active >= len(wm.modset_preset):
+        wm.modset_active = max(0, len(wm.modset_preset) - 1)
+    mark_synced()
+    base = {
+        "Preference": dict(preset_data.get("Preference", {})),
+        "ModSet": [dict(zip(store.ENTRY_KEYS, store.entry_values(e))) for e in preset_data.get("ModSet", [])],
+    }
+    _remember_bank(wm, name, stat, content_hash, base)
+    scene = bpy.context.scene
+    if scene is not None and scene.modset_bank != name:
+        scene.modset_bank = name
+    return True
+
+# --- External Changes ---
+def _changed_on_disk(wm, name):
+    """True when another program wrote bank name since the library was synced with it"""
+    return (_loaded_bank['name'] == name and _loaded_bank['wm'] == wm.as_pointer()
+            and _loaded_bank['stat'] is not None and store.bank_stat(name) != _loaded_bank['stat'])
+
+def _keep_conflicts(name, conflicts, remote):
+    if conflicts:
+        copy_name = f"{name} (external)"
+        store.save_bank(copy_name, remote)
+        print(f"ModSet: '{name}' was changed by another program and here, "
+              f"{len(conflicts)} conflicting edits kept the local version. "
+              f"The external version was saved as bank '{copy_name}'.")
+
+def merge_external(wm, name, stat, content_hash, remote):
+    """Merge a bank changed by another program into the library and write the result.
+
+    remote is the bank as read from disk, or None when only its timestamps
+    changed. Local edits made since the last sync are kept. Where they clash
+    with the external edit, the external version of the bank is saved as
+    '<name> (external)' so nothing is lost.
+    """
+    if remote is None:
+        _loaded_bank['stat'] = stat
+        return
+    local = library_preset(wm)
+    base = _loaded_bank['base'] or local
+    merged, conflicts = store.merge_presets(base, local, remote)
+    with muted_changes():
+        patch_presets(wm.modset_preset, merged["ModSet"])
+        apply_preference(wm, merged["Preference"])
+    _keep_conflicts(name, conflicts, remote)
+    if not store.same_presets(merged, remote):
+        # Local edits survived the merge, write them on top of the external edit
+        store.save_bank(name, merged)
+        stat, content_hash = store.bank_stat(name), None
+    mark_synced()
+    _remember_bank(wm, name, stat, content_hash, merged)
+    invalidate_draw_state(context=False)
+
+def _take_compaction(wm):
+    """Adopt the stat of a bank our own compaction rewrote, so it isn't merged as an external edit"""
+    compacted = _watch_state['compacted']
+    if compacted is None:
+        return
+    _watch_state['compacted'] = None
+    name = compacted['name']
+    if (name == _loaded_bank['name'] and _loaded_bank['wm'] == wm.as_pointer()
+            and store.bank_stat(name) == compacted['stat']):
+        _loaded_bank.update(stat=compacted['stat'], hash=compacted['hash'])
+
+def _merge_disk_changes(wm, bank):
+    """Merge bank into the library if another program wrote it. Call with the store lock held."""
+    _take_compaction(wm)
+    if not _changed_on_disk(wm, bank):
+        return False
+    stat = store.bank_stat(bank)
+    remote = store.load_bank(bank)
+    if remote is None:
+        return False
+    merge_external(wm, bank, stat, None, remote)
+    return True
+
+def merge_legacy(wm, legacy):
+    """Write the prefs.json merges planned on the watcher thread.
+
+    legacy comes from store.read_legacy, with the plans of
+    store.plan_legacy_merge under "plans". Nothing is merged here. If a
+    bank was written since it was read, or the library has edits not yet
+    in its bank, nothing is written and prefs.json is read again on the
+    next poll. Runs under the store lock, like flush_save.
+    """
+    plans = legacy.get("plans") or []
+    loaded = _loaded_bank['name'] if _loaded_bank['wm'] == wm.as_pointer() else None
+    with store.locked():
+        for plan in plans:
+            name = plan["name"]
+            if store.bank_stat(name) != plan["stat"]:
+                return
+            if name == loaded and len(wm.modset_prefs) and (
+                    _save_state['dirty'] or not _bank_is_loaded(wm, name, plan["stat"])):
+                flush_save()
+                return
+        for plan in plans:
+            name = plan["name"]
+            _keep_conflicts(name, plan["conflicts"], plan["remote"])
+            if plan["changed"]:
+                store.save_bank(name, plan["merged"])
+            if name == loaded and len(wm.modset_prefs):
+                with muted_changes():
+                    patch_presets(wm.modset_preset, plan["merged"]["ModSet"])
+                    apply_preference(wm, plan["merged"]["Preference"])
+                mark_synced()
+                _remember_bank(wm, name, store.bank_stat(name), None, plan["merged"])
+                invalidate_draw_state(context=False)
+        store.record_legacy(legacy)
+
+def _read_worker(name, known_hash, legacy):
+    result = None
+    try:
+        stat = store.bank_stat(name)
+        content_hash = store.bank_content_hash(name)
+        remote = None if content_hash == known_hash else store.load_bank(name)
+        # prefs.json is read and merged here, only the writes are left to the main thread
+        if legacy:
+            legacy = store.read_legacy()
+            legacy["plans"] = store.plan_legacy_merge(legacy)
+        result = {'name': name, 'stat': stat, 'hash': content_hash, 'preset': remote,
+                  'legacy': legacy or None}
+    except Exception as e:
+        print(f"Preset watch error: {str(e)}")
+    finally:
+        _watch_state['result'] = result
+        _watch_state['reading'] = False
+
+def _poll_external(wm):
+    """Merge finished background reads and start new ones when a bank changed.
+
+    Returns True while an external change is still being read.
+    """
+    with store.locked():
+        _take_compaction(wm)
+    result = _watch_state['result']
+    if result is not None:
+        _watch_state['result'] = None
+        if result['name'] == _loaded_bank['name'] and _loaded_bank['wm'] == wm.as_pointer():
+            with store.locked():
+                if store.bank_stat(result['name']) == result['stat']:
+                    merge_external(wm, result['name'], result['stat'], result['hash'], result['preset'])
+        if result['legacy'] is not None:
+            merge_legacy(wm, result['legacy'])
+    if _watch_state['reading']:
+        return True
+    name = _loaded_bank['name']
+    if name is None or _loaded_bank['wm'] != wm.as_pointer():
+        return False
+    legacy = store.legacy_changed()
+    if not legacy and store.bank_stat(name) == _loaded_bank['stat']:
+        return False
+    # Parsing a large bank would stall the UI, so it happens on a thread
+    _watch_state['reading'] = True
+    threading.Thread(target=_read_worker, args=(name, _loaded_bank['hash'], legacy), daemon=True).start()
+    return True
+
+def _watch_timer():
+    wm = bpy.context.window_manager
+    try:
+        changed = wm is not None and len(wm.modset_prefs) and _poll_external(wm)
+    except Exception as e:
+        print(f"Preset watch error: {str(e)}")
+        changed = False
+    if changed:
+        _watch_state['interval'] = WATCH_MIN_INTERVAL
+    else:
+        _watch_state['interval'] = min(_watch_state['interval'] * 2, WATCH_MAX_INTERVAL)
+    return _watch_state['interval']
+
+# --- Save Scheduler ---
+def request_save():
+    """Schedule a full snapshot of the presets, coalesced with other changes"""
+    invalidate_draw_state(context=False)
+    _save_state['snapshot'] = True
+    _save_state['pending'].clear()
+    _schedule_flush()
+
+def record_change(op):
+    """Journal a change that was already made to wm.modset_preset.
+
+    See store.apply_op for the record format.
+    """
+    invalidate_draw_state(context=False)
+    if _save_state['muted']:
+        return
+    if not _save_state['synced'] or _save_state['snapshot']:
+        request_save()
+        return
+    _save_state['pending'].append(op)
+    _schedule_flush()
+
+def record_item_change(item, field, value):
+    # path_from_id() gives 'modset_preset[INDEX]'
+    path = item.path_from_id()
+    index = int(path[path.rindex('[') + 1:-1])
+    record_change({"op": "set", "index": index, "field": field, "value": value})
+
+def record_prefs_change():
+    wm = bpy.context.window_manager
+    if len(wm.modset_prefs) == 0:
+        return
+    record_change({"op": "prefs", "value": prefs_to_dict(wm)})
+
+@contextmanager
+def muted_changes():
+    """Stop property update callbacks from journaling while items are being built"""
+    _save_state['muted'] += 1
+    try:
+        yield
+    finally:
+        _save_state['muted'] -= 1
+
+def mark_synced(synced=True):
+    """Tell the scheduler whether wm.modset_preset matches the file on disk"""
+    _save_state['synced'] = synced
+    invalidate_draw_state(context=False)
+    if synced:
+        _save_state['pending'].clear()
+        _save_state['snapshot'] = False
+
+def _schedule_flush():
+    _save_state['dirty'] = True
+    if not bpy.app.timers.is_registered(_save_timer):
+        bpy.app.timers.register(_save_timer, first_interval=SAVE_DELAY)
+
+@profiling.timed('flush_save')
+def flush_save():
+    """Write pending changes now, if there are any"""
+    if bpy.app.timers.is_registered(_save_timer):
+        bpy.app.timers.unregister(_save_timer)
+    if not _save_state['dirty']:
+        return
+    _save_state['dirty'] = False
+    wm = bpy.context.window_manager
+    try:
+        if wm is None or len(wm.modset_prefs) == 0:
+            return
+        bank = current_bank(wm)
+        # Hold the lock from the disk check to the write, journal records
+        # address entries by index and must land on the snapshot checked
+        with store.locked():
+            if _merge_disk_changes(wm, bank):
+                # Never write over an external edit, merge it in instead
+                return
+            if _save_state['snapshot']:
+                preset = library_preset(wm)
+                written = store.save_bank(bank, preset)
+                mark_synced()
+                _remember_bank(wm, bank, store.bank_stat(bank), base=preset)
+            else:
+                pending = _save_state['pending']
+                _save_state['pending'] = []
+                written = store.append_bank_journal(bank, pending, len(wm.modset_preset))
+                base = _loaded_bank['base']
+                if base is not None:
+                    for op in pending:
+                        store.apply_op(base, op)
+                _remember_bank(wm, bank, store.bank_stat(bank))
+        profiling.add_bytes('flush_save', written)
+    except Exception as e:
+        print(f"Preset save error: {str(e)}")
+        # The file may no longer match, make the next change rewrite it
+        _save_state['synced'] = False
+        return
+    if store.bank_journal_size(bank) > store.COMPACT_THRESHOLD and not _save_state['compacting']:
+        _save_state['compacting'] = True
+        threading.Thread(target=_compact_worker, args=(bank,), daemon=True).start()
+
+def _compact_worker(bank):
     try:
-        with open(file_path, "r") as f:
-            existing = json.load(f)
-    except FileNotFoundError:
-        existing = []
-    existing.append(data)
-    with open(file_path, "w") as f:
-        json.dump(existing, f, indent=4)
-
-def draw_edit_panel(layout_func):
+        written = store.compact_bank(bank)
+        profiling.add_bytes('compact', written)
+        if written:
+            # Handed to the main thread like a watcher result, see _take_compaction
+            with store.locked():
+                _watch_state['compacted'] = {'name': bank, 'stat': store.bank_stat(bank),
+                                             'hash': store.bank_content_hash(bank)}
+    except Exception as e:
+        print(f"Preset compaction error: {str(e)}")
+    finally:
+        _save_state['compacting'] = False
+
+def _save_timer():
+    wm = bpy.context.window_manager
+    if wm is not None and len(wm.modset_prefs) and _poll_external(wm):
+        # Wait for the external change to be read and merged instead of blocking
+        return SAVE_DELAY
+    flush_save()
+    return None
+
+@persistent
+def _flush_on_load(*args):
+    flush_save()
+
+@persistent
+def _mark_unsynced(*args):
+    # A loaded file starts with an empty library that has to be read again
+    _save_state['synced'] = False
+    invalidate_draw_state()
+
+# Scene properties of older versions, which kept a copy of the library in
+# every scene of every saved file
+LEGACY_SCENE_KEYS = ('modset_preset', 'modset_prefs', 'modset_active',
+                     'modset_isexpand', 'modset_setting', 'sna_show_preset')
+
+def drop_scene_copies():
+    """Remove library copies left in the scenes by older versions, so saving doesn't keep them"""
+    for scene in bpy.data.scenes:
+        for key in LEGACY_SCENE_KEYS:
+            if key in scene:
+                del scene[key]
+
+def load_session_library():
+    """Load the bank the current scene refers to into the session library"""
+    wm = bpy.context.window_manager
+    if wm is None:
+        return
+    scene = bpy.context.scene
+    name = scene.modset_bank if scene is not None else ''
+    if not name or store.bank_entry(name) is None:
+        name = None
+    load_bank(wm, name)
+
+@persistent
+def _load_library_on_load(*args):
+    drop_scene_copies()
+    load_session_library()
+
+def _load_library_timer():
+    # bpy.data is not accessible while add-ons register
+    drop_scene_copies()
+    load_session_library()
+    return None
+
+@persistent
+def _subscribe_on_load(*args):
+    # Loading a file clears all msgbus subscriptions
+    subscribe_draw_state()
+
+@persistent
+def _refresh_icons_on_load(*args):
+    refresh_icon_values()
+
+def _refresh_icons_timer():
+    refresh_icon_values()
+    return None
+
+def draw_edit_panel(layout_func, state):
+    wm = bpy.context.window_manager
+    prefs = wm.modset_prefs[0]
+    icons = state['icons']
+    active = wm.modset_active
+    count = state['count']
+    columns = state['columns']
     split = layout_func.split(factor=0.45, align=False)
     box = split.box()
-    valid = (check_prop("bpy.context.scene.modset_preset", globals(), locals()) and
-             len(bpy.context.scene.modset_preset) > bpy.context.scene.modset_active and
-             bpy.context.scene.modset_active >= 0)
+    valid = count > active >= 0
     box.enabled = valid
     box.active = valid
 
     col = box.column(align=True)
     row = col.row(align=True)
     if valid:
+        item = wm.modset_preset[active]
         op = row.operator(
             'modset.open_icon_picker',
             text='',
-            icon_value=str_to_icon(bpy.context.scene.modset_preset[bpy.context.scene.modset_active].modicon),
+            icon_value=item.iconvalue,
             emboss=True
         )
-        row.prop(bpy.context.scene.modset_preset[bpy.context.scene.modset_active], 'modname', text='', emboss=True)
+        row.prop(item, 'modname', text='', emboss=True)
         row2 = row.row(align=False)
         row2.alert = True
-        op = row2.operator('modset.delete_active', text='', icon_value=str_to_icon('TRASH'), emboss=True)
+        op = row2.operator('modset.delete_active', text='', icon_value=icons['TRASH'], emboss=True)
         op.collection_index = 0
     else:
         blank = row.row(align=True)
@@ -198,34 +1079,34 @@ def draw_edit_panel(layout_func):
     split2 = col.split(factor=0.25, align=False)
     split2.separator(factor=0.0)
     split3 = split2.split(factor=0.666, align=False)
-    split3.enabled = (bpy.context.scene.modset_active >= bpy.context.scene.modset_prefs[0].columnnumber)
-    op = split3.operator('modset.move_button', text='', icon_value=str_to_icon('SORT_DESC'), emboss=True)
-    op.s_amount = int(bpy.context.scene.modset_prefs[0].columnnumber * -1)
+    split3.enabled = (active >= columns)
+    op = split3.operator('modset.move_button', text='', icon_value=icons['SORT_DESC'], emboss=True)
+    op.s_amount = int(columns * -1)
     split3.separator(factor=0.0)
     row_move = col.row(align=True)
     split4 = row_move.split(factor=0.1, align=True)
-    split4.enabled = (bpy.context.scene.modset_active > 0)
+    split4.enabled = (active > 0)
     split4.separator(factor=0.0)
-    op = split4.operator('modset.move_button', text='', icon_value=str_to_icon('BACK'), emboss=True)
+    op = split4.operator('modset.move_button', text='', icon_value=icons['BACK'], emboss=True)
     op.s_amount = -1
     split5 = row_move.split(factor=0.9, align=True)
-    split5.enabled = (bpy.context.scene.modset_active < len(bpy.context.scene.modset_preset) - 1)
-    op = split5.operator('modset.move_button', text='', icon_value=str_to_icon('FORWARD'), emboss=True)
+    split5.enabled = (active < count - 1)
+    op = split5.operator('modset.move_button', text='', icon_value=icons['FORWARD'], emboss=True)
     op.s_amount = 1
     split5.separator(factor=0.0)
     split6 = col.split(factor=0.25, align=False)
     split6.separator(factor=0.0)
     split7 = split6.split(factor=0.666, align=False)
-    split7.enabled = (bpy.context.scene.modset_active < len(bpy.context.scene.modset_preset) - bpy.context.scene.modset_prefs[0].columnnumber)
-    op = split7.operator('modset.move_button', text='', icon_value=str_to_icon('SORT_ASC'), emboss=True)
-    op.s_amount = bpy.context.scene.modset_prefs[0].columnnumber
+    split7.enabled = (active < count - columns)
+    op = split7.operator('modset.move_button', text='', icon_value=icons['SORT_ASC'], emboss=True)
+    op.s_amount = columns
     split7.separator(factor=0.0)
     col2 = split.column(align=True)
     col2.separator(factor=0.8)
     
     # Column number setting
     split_prop = col2.split(factor=0.24, align=True)
-    split_prop.prop(bpy.context.scene.modset_prefs[0], 'columnnumber', text='', icon_value=0, emboss=True)
+    split_prop.prop(prefs, 'columnnumber', text='', icon_value=0, emboss=True)
     split_prop.label(text='Column', icon_value=0)
     
 
@@ -234,135 +1115,370 @@ def draw_edit_panel(layout_func):
     # Icon button
     icon_btn = row_buttons.row(align=True)
     icon_btn.prop(
-        bpy.context.scene.modset_prefs[0], 'showmodicon',
+        prefs, 'showmodicon',
         text="Icon",
-        icon='HIDE_OFF' if bpy.context.scene.modset_prefs[0].showmodicon else 'HIDE_ON',
+        icon='HIDE_OFF' if prefs.showmodicon else 'HIDE_ON',
         emboss=True,
         toggle=True
     )
-    icon_btn.active = bpy.context.scene.modset_prefs[0].showmodicon
+    icon_btn.active = prefs.showmodicon
     
     # Name button
     name_btn = row_buttons.row(align=True)
     name_btn.prop(
-        bpy.context.scene.modset_prefs[0], 'showmodname',
+        prefs, 'showmodname',
         text="Name",
-        icon='HIDE_OFF' if bpy.context.scene.modset_prefs[0].showmodname else 'HIDE_ON',
+        icon='HIDE_OFF' if prefs.showmodname else 'HIDE_ON',
+        emboss=True,
+        toggle=True
+    )
+    name_btn.active = prefs.showmodname
+
+    # Bank selector button
+    bank_btn = row_buttons.row(align=True)
+    bank_btn.prop(
+        wm, 'sna_show_preset',
+        text="Banks",
+        icon='HIDE_OFF' if wm.sna_show_preset else 'HIDE_ON',
         emboss=True,
         toggle=True
     )
-    name_btn.active = bpy.context.scene.modset_prefs[0].showmodname
+    bank_btn.active = wm.sna_show_preset
     
-    col2.operator('modset.load_preset', text='Load from Prefs', icon_value=str_to_icon('FILE_REFRESH'), emboss=True)
+    col2.operator('modset.load_preset', text='Load from Prefs', icon_value=icons['FILE_REFRESH'], emboss=True)
     
     delete_row = col2.row()
     delete_row.alert = True
-    delete_row.operator('modset.delete_all', text='Delete all ModSet', icon_value=str_to_icon('TRASH'), emboss=True)
+    delete_row.operator('modset.delete_all', text='Delete all ModSet', icon_value=icons['TRASH'], emboss=True)
 
 
-def get_modifier_parameters(mod):
-    """Extract parameters from a modifier that can be saved and restored later"""
+# --- Capture Schemas ---
+# Modifier type -> tuple of (identifier, kind, default) for the properties a
+# preset saves, built on first capture and kept for the session. Kinds:
+#   'scalar'      int/float/bool/str or non-flag enum
+#   'array'       fixed size array, 'bool_array' for boolean arrays
+#   'enum_flag'   set of enum items
+#   'names'       collection saved as a list of item names
+#   'collection'  pointer to a Collection, saved as 'collection_name'
+# default is the RNA default shaped like a captured value, or NO_DEFAULT.
+# Values equal to it are not saved, so a preset only holds what was changed.
+NO_DEFAULT = object()
+_capture_schemas = {}
+
+def rna_default(prop, kind):
+    """RNA default of prop shaped like its captured value, NO_DEFAULT if it has none"""
+    try:
+        if kind == 'array':
+            return list(prop.default_array)
+        if kind == 'bool_array':
+            return [bool(v) for v in prop.default_array]
+        if kind == 'enum_flag':
+            return sorted(prop.default_flag)
+        if kind == 'scalar':
+            default = prop.default
+            # Dynamic enums have no static items and no usable default
+            if prop.type == 'ENUM' and default not in prop.enum_items:
+                return NO_DEFAULT
+            return default
+    except (AttributeError, TypeError):
+        pass
+    return NO_DEFAULT
+
+def same_value(value, default):
+    """Compare a captured value with a default, floats with a little tolerance"""
+    if isinstance(value, (list, tuple)):
+        return (isinstance(default, (list, tuple)) and len(value) == len(default)
+                and all(same_value(v, d) for v, d in zip(value, default)))
+    if isinstance(value, float) or isinstance(default, float):
+        try:
+            return math.isclose(value, default, rel_tol=1e-6, abs_tol=1e-9)
+        except TypeError:
+            return False
+    return value == default
+
+def build_capture_schema(mod):
+    """Work out which properties of mod are saved, and how"""
     ignore_props = {
         "show_viewport", "show_render", "show_in_editmode", "show_on_cage",
-        "is_active", "show_expanded", "use_pin_to_last", "use_apply_on_spline"
+        "is_active", "show_expanded", "use_pin_to_last", "use_apply_on_spline",
+        "name", "type", "rna_type"
     }
-    
     # Internal properties to ignore for Hook modifiers
-    hook_internal_props = {"matrix_inverse", "center", "matrix"}
-    
-    params = {}
+    if mod.type == 'HOOK':
+        ignore_props |= {"matrix_inverse", "center", "matrix"}
+
+    schema = []
     for prop in mod.bl_rna.properties:
-        if prop.is_readonly:
+        if prop.is_readonly or prop.identifier in ignore_props:
             continue
-        if prop.identifier in {'name', 'type', 'rna_type'} or prop.identifier in ignore_props:
-            continue
-        if mod.type == 'HOOK' and prop.identifier in hook_internal_props:
-            continue
-        
-        try:
-            value = getattr(mod, prop.identifier)
-            
-            # Special handling for collection references (Boolean modifier etc.)
-            if prop.type == 'POINTER' and prop.identifier == 'collection' and value:
-                if hasattr(value, "name"):
-                    params['collection_name'] = value.name  # Save collection name
-                continue
-            # Ignore other object references
-            elif prop.type == 'POINTER':
+        if prop.type == 'POINTER':
+            # Collection references (Boolean modifier etc.) are saved by name,
+            # other object references are not saved
+            if prop.identifier == 'collection':
+                kind = 'collection'
+            else:
                 continue
-                
-            # Process array properties
-            if getattr(prop, 'array_length', 0) > 0:
-                if prop.type == 'BOOLEAN':
-                    params[prop.identifier] = [bool(v) for v in value]
-                else:
-                    params[prop.identifier] = list(value)
-            # Process collection properties (save as name list)
-            elif prop.type == 'COLLECTION' and value:
+        elif getattr(prop, 'array_length', 0) > 0:
+            kind = 'bool_array' if prop.type == 'BOOLEAN' else 'array'
+        elif prop.type == 'COLLECTION':
+            kind = 'names'
+        elif prop.type == 'ENUM' and prop.is_enum_flag:
+            kind = 'enum_flag'
+        else:
+            kind = 'scalar'
+        schema.append((prop.identifier, kind, rna_default(prop, kind)))
+    return tuple(schema)
+
+def get_capture_schema(mod):
+    schema = _capture_schemas.get(mod.type)
+    if schema is None:
+        schema = _capture_schemas[mod.type] = build_capture_schema(mod)
+    return schema
+
+@profiling.timed('get_modifier_parameters')
+def get_modifier_parameters(mod):
+    """Extract parameters from a modifier that can be saved and restored later.
+
+    Properties still at their RNA default are left out.
+    """
+    params = {}
+    for identifier, kind, default in get_capture_schema(mod):
+        try:
+            value = getattr(mod, identifier)
+            if kind == 'scalar':
+                # Save basic data types only
+                if isinstance(value, (int, float, bool, str)):
+                    params[identifier] = value
+            elif kind == 'array':
+                params[identifier] = list(value)
+            elif kind == 'bool_array':
+                params[identifier] = [bool(v) for v in value]
+            elif kind == 'enum_flag':
+                params[identifier] = sorted(value)
+            elif kind == 'names':
+                # Save collection as name list, don't save empty lists
                 names = [item.name for item in value if hasattr(item, "name")]
-                if names:  # Don't save empty lists
-                    params[prop.identifier] = names
-            # Save basic data types only
-            elif isinstance(value, (int, float, bool, str)):
-                params[prop.identifier] = value
-            # Process set types
-            elif isinstance(value, (set, frozenset)):
-                params[prop.identifier] = list(value)
+                if names:
+                    params[identifier] = names
+            elif kind == 'collection' and value and hasattr(value, "name"):
+                params['collection_name'] = value.name  # Save collection name
+            if default is not NO_DEFAULT and identifier in params and same_value(params[identifier], default):
+                del params[identifier]
         except Exception as e:
-            print(f"Error processing {prop.identifier}: {str(e)}")
+            print(f"Error processing {identifier}: {str(e)}")
     return params
 
-def restore_parameters(mod, params):
-    if 'collection_name' in params and hasattr(mod, 'collection'):
-        collection_name = params.pop('collection_name')
-        collection = bpy.data.collections.get(collection_name)
-        if collection:
-            mod.collection = collection
-            print(f"Restored collection reference: {collection_name}")
-        else:
-            print(f"Warning: Collection {collection_name} not found")
-    
+# --- Parsed Parameters ---
+# Parameter strings of presets, parsed once and shared by every apply path.
+# Entries are frozen (dicts become read-only mappings, lists tuples) so no
+# caller can change what the next one gets. Keyed by a digest of the string
+# so long parameter strings are not kept around as keys.
+PARAMETER_CACHE_SIZE = 256
+_parsed_parameters = OrderedDict()
+_EMPTY_PARAMETERS = MappingProxyType({})
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def thaw(value):
+    """Plain dict/list copy of a value frozen by get_parameters"""
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+# Same digest as the blob keys of bank files, see container.py
+parameters_key = store.parameters_key
+dump_parameters = store.dump_parameters
+
+@profiling.timed('parse_parameters')
+def get_parameters(text):
+    """Return (key, params) for a preset's parameters string.
+
+    params is a read-only mapping, empty when text is empty or broken. key
+    identifies the string and is what restore plans are cached under.
+    """
+    if not text:
+        return b'', _EMPTY_PARAMETERS
+    key = parameters_key(text)
+    params = _parsed_parameters.get(key)
+    if params is not None:
+        _parsed_parameters.move_to_end(key)
+        return key, params
+    try:
+        params = _freeze(json.loads(text))
+    except Exception as e:
+        print(f"Parameter parsing error: {str(e)}")
+        params = _EMPTY_PARAMETERS
+    if not isinstance(params, MappingProxyType):
+        params = _EMPTY_PARAMETERS
+    _parsed_parameters[key] = params
+    if len(_parsed_parameters) > PARAMETER_CACHE_SIZE:
+        _parsed_parameters.popitem(last=False)
+    return key, params
+
+# --- Restore Plans ---
+# A restore plan is a tuple of (kind, key, value) steps compiled from a
+# parameter dict for one modifier type. All RNA lookups, type checks and
+# enum validation happen while compiling, so running a cached plan is only
+# setattr calls.
+RESTORE_PLAN_CACHE_SIZE = 256
+_restore_plans = OrderedDict()
+
+# Modifier type -> {identifier: step} for the properties where a newly added
+# modifier does not start at the RNA default that capture compared against
+_default_fixups = {}
+
+def get_default_fixups(mod):
+    """Steps setting the RNA default on the properties a new modifier has at another value.
+
+    Built from the first modifier of each type that gets restored, which is
+    always one that was just added.
+    """
+    fixups = _default_fixups.get(mod.type)
+    if fixups is not None:
+        return fixups
+    fixups = {}
+    for identifier, kind, default in get_capture_schema(mod):
+        if default is NO_DEFAULT or kind in ('names', 'collection'):
+            continue
+        try:
+            value = getattr(mod, identifier)
+            if kind in ('array', 'bool_array'):
+                value = list(value)
+            elif kind == 'enum_flag':
+                value = sorted(value)
+        except Exception:
+            continue
+        if not same_value(value, default):
+            fixups[identifier] = ('set', identifier, set(default) if kind == 'enum_flag' else default)
+    _default_fixups[mod.type] = fixups
+    return fixups
+
+def compile_restore_plan(mod, params):
+    """Compile params into restore steps for modifiers of the same type as mod.
+
+    Properties missing from params were at their RNA default when captured,
+    so the plan only sets them where a new modifier starts elsewhere.
+    """
+    props = mod.bl_rna.properties
+    steps = [step for identifier, step in get_default_fixups(mod).items() if identifier not in params]
+    if 'collection_name' in params and 'collection' in props:
+        steps.append(('collection', 'collection', params['collection_name']))
+
     for key, value in params.items():
-        prop = mod.bl_rna.properties.get(key)
+        if key == 'collection_name':
+            continue
+        prop = props.get(key)
         if not prop:
             continue
 
-        if prop.type == 'COLLECTION' and isinstance(value, list) and all(isinstance(item, str) for item in value):
-            try:
-                # Clear existing collection
-                if hasattr(getattr(mod, key), "clear"):
-                    getattr(mod, key).clear()
-                
-                # Add collection items from name list
+        if prop.type == 'COLLECTION':
+            if isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+                steps.append(('names', key, tuple(value)))
+        # Process array properties
+        elif getattr(prop, 'array_length', 0) > 0:
+            steps.append(('set', key, tuple(value)))
+        # Process enum flags, dropping items this Blender version doesn't know
+        elif prop.is_enum_flag:
+            steps.append(('set', key, {item for item in value if item in prop.enum_items}))
+        # Skip enum values that aren't valid here, dynamic enums have no static items
+        elif prop.type == 'ENUM' and len(prop.enum_items) and value not in prop.enum_items:
+            print(f"Enum setting error [{key}]: '{value}' is not a valid item")
+        # Process basic types
+        else:
+            steps.append(('set', key, value))
+    return tuple(steps)
+
+def get_restore_plan(mod, params, key):
+    """Return the cached plan for (mod.type, Blender version, key), compiling it once"""
+    cache_key = (mod.type, bpy.app.version, key)
+    plan = _restore_plans.get(cache_key)
+    if plan is not None:
+        _restore_plans.move_to_end(cache_key)
+        return plan
+    plan = compile_restore_plan(mod, params)
+    _restore_plans[cache_key] = plan
+    if len(_restore_plans) > RESTORE_PLAN_CACHE_SIZE:
+        _restore_plans.popitem(last=False)
+    return plan
+
+def run_restore_plan(mod, plan):
+    for kind, key, value in plan:
+        try:
+            if kind == 'set':
+                setattr(mod, key, value)
+            elif kind == 'collection':
+                collection = bpy.data.collections.get(value)
+                if collection:
+                    mod.collection = collection
+                    print(f"Restored collection reference: {value}")
+                else:
+                    print(f"Warning: Collection {value} not found")
+            elif kind == 'names':
+                # Replace the collection items with ones named from the list
                 coll = getattr(mod, key)
-                for name in value:
-                    if hasattr(coll, "add"):
+                if hasattr(coll, "clear"):
+                    coll.clear()
+                if hasattr(coll, "add"):
+                    for name in value:
                         item = coll.add()
                         if hasattr(item, "name"):
                             item.name = name
-            except Exception as e:
-                print(f"Collection restoration error [{key}]: {str(e)}")
-            continue
+        except Exception as e:
+            print(f"Property assignment error [{key}]: {str(e)}")
 
-        # Process array properties
-        elif getattr(prop, 'array_length', 0) > 0:
+@profiling.timed('restore_parameters')
+def restore_parameters(mod, params, key=None):
+    """Restore saved parameters on mod.
+
+    key identifies params, normally the key get_parameters returned for the
+    preset's parameters string. When it is given the compiled plan is
+    cached, so editing the preset (which changes the string) naturally
+    invalidates it.
+    """
+    if key is None:
+        plan = compile_restore_plan(mod, params)
+    else:
+        plan = get_restore_plan(mod, params, key)
+    run_restore_plan(mod, plan)
+
+def restore_geometry_nodes_parameters(mod, params):
+    """Set geometry nodes modifier inputs from a saved parameter dict"""
+    for key, value in params.items():
+        # Process collection name references
+        if isinstance(value, str):
             try:
-                setattr(mod, key, tuple(value))
+                # Try to find the collection in the scene
+                collection = bpy.data.collections.get(value)
+                if collection and key in mod:
+                    # Set collection reference
+                    mod[key] = collection
+                    print(f"Restored collection reference for GN: {key} = {value}")
+                    continue
+                else:
+                    # Set as regular string if collection not found
+                    mod[key] = value
             except Exception as e:
-                print(f"Array restoration error [{key}]: {str(e)}")
-        # Process enum flags
-        elif prop.is_enum_flag:
+                print(f"Failed to set collection value [{key}]: {str(e)}")
+                mod[key] = value
+        # Ignore complex values like object references, only set basic data types
+        elif isinstance(value, (int, float, bool)):
             try:
-                set_value = {item for item in value if item in prop.enum_items}
-                setattr(mod, key, set_value)
+                mod[key] = value
             except Exception as e:
-                print(f"Enum setting error [{key}]: {str(e)}")
-        # Process basic types
-        else:
+                print(f"Failed to set value [{key}]: {str(e)}")
+        # Process list values
+        elif isinstance(value, (list, tuple)):
             try:
-                setattr(mod, key, value)
+                mod[key] = list(value)
             except Exception as e:
-                print(f"Property assignment error [{key}]: {str(e)}")
+                print(f"Failed to set list value [{key}]: {str(e)}")
 
 def safe_serialize(value):
     """Convert any Blender data type to a safe JSON format"""
@@ -389,6 +1505,7 @@ def safe_serialize(value):
         print(f"Unsupported type: {type(value).__name__}")
         return None
 
+@profiling.timed('get_geometry_nodes_parameters')
 def get_geometry_nodes_parameters(mod):
     params = {}
     if not mod.node_group:
@@ -422,10 +1539,150 @@ def get_geometry_nodes_parameters(mod):
     
     return params
 
+# Normalized asset library root -> (library name, root). Essentials have the
+# name ''. 'key' is the (name, path) of every library it was built from.
+_asset_library_index = {
+    'key': None,
+    'roots': {},
+}
+# library_weak_reference.filepath -> (library name, blend file relative to
+# the library root), or None outside every library
+_asset_files = {}
+
+def _normalize_path(path):
+    return os.path.normcase(os.path.normpath(bpy.path.abspath(path)))
+
+def get_asset_library_index():
+    """Library roots by normalized path, rebuilt when the asset library preferences change"""
+    key = tuple((lib.name, lib.path) for lib in bpy.context.preferences.filepaths.asset_libraries)
+    index = _asset_library_index
+    if index['key'] != key:
+        roots = {}
+        essentials = bpy.utils.system_resource('DATAFILES', path='assets')
+        if essentials:
+            roots[_normalize_path(essentials)] = ('', os.path.normpath(essentials))
+        for name, path in key:
+            if path:
+                roots.setdefault(_normalize_path(path), (name, os.path.normpath(bpy.path.abspath(path))))
+        index['key'] = key
+        index['roots'] = roots
+        _asset_files.clear()
+    return index['roots']
+
+def resolve_asset_file(filepath):
+    """(library name, path relative to the library) of a blend file, None outside every library"""
+    roots = get_asset_library_index()
+    if filepath in _asset_files:
+        return _asset_files[filepath]
+    found = None
+    parent = os.path.dirname(_normalize_path(filepath))
+    # The innermost root wins when libraries are nested
+    while True:
+        root = roots.get(parent)
+        if root is not None:
+            found = (root[0], os.path.relpath(os.path.normpath(bpy.path.abspath(filepath)), root[1]))
+            break
+        up = os.path.dirname(parent)
+        if up == parent:
+            break
+        parent = up
+    _asset_files[filepath] = found
+    return found
+
+def resolve_node_group_asset(node_group):
+    """(library name, relative asset identifier) to add node_group again, None for local groups.
+
+    The group is named as in its library file, whatever it or its modifier
+    was renamed to here.
+    """
+    weak = getattr(node_group, 'library_weak_reference', None)
+    if not weak:
+        return None
+    asset = resolve_asset_file(weak.filepath)
+    if asset is None:
+        return None
+    # id_name is the ID code and the name, 'NTGroup'
+    return asset[0], os.path.join(asset[1], 'NodeTree', weak.id_name[2:])
+
+# modtype of a preset holding a whole modifier stack. Its parameters are
+# {"Stack": [entry, ...]} with one bank entry per modifier, in stack order.
+STACK_TYPE = 'STACK'
+STACK_ICON = 'MODIFIER'
+
+def capture_modifier(mod):
+    """Bank entry (see preset_to_dict) for mod with its parameters"""
+    entry = {"Name": mod.name, "Type": mod.type, "Icon": get_mod_icon(mod.type),
+             "Path": "", "AssetLibrary": "", "Parameters": "{}"}
+    if mod.type == 'NODES' and mod.node_group:
+        entry["Icon"] = 'GEOMETRY_NODES'
+        asset = resolve_node_group_asset(mod.node_group)
+        if asset is not None:
+            entry["AssetLibrary"], entry["Path"] = asset
+        params = get_geometry_nodes_parameters(mod)
+    else:
+        params = get_modifier_parameters(mod)
+    try:
+        entry["Parameters"] = dump_parameters(params)
+    except Exception as e:
+        print(f"Parameter serialization error ({mod.name}): {str(e)}")
+    return entry
+
+def capture_stack(obj):
+    """Bank entry holding every modifier of obj, applied back with apply.apply_stack"""
+    stack = []
+    for mod in obj.modifiers:
+        try:
+            stack.append(capture_modifier(mod))
+        except Exception as e:
+            print(f"Modifier capture error ({mod.name}): {str(e)}")
+    return {"Name": obj.name, "Type": STACK_TYPE, "Icon": STACK_ICON, "Path": "", "AssetLibrary": "",
+            "Parameters": dump_parameters({"Stack": stack})}
+
 def register():
     global _icons
     _icons = bpy.utils.previews.new()
+    build_icon_table()
+    bpy.app.handlers.load_pre.append(_flush_on_load)
+    bpy.app.handlers.load_post.append(_refresh_icons_on_load)
+    bpy.app.handlers.load_post.append(_subscribe_on_load)
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    subscribe_draw_state()
+    # bpy.data is not accessible while add-ons register
+    bpy.app.timers.register(_refresh_icons_timer, first_interval=0.0)
+    # The library lives on the window manager, which undo leaves alone
+    bpy.app.handlers.load_post.append(_mark_unsynced)
+    bpy.app.handlers.load_post.append(_load_library_on_load)
+    bpy.app.timers.register(_load_library_timer, first_interval=0.0)
+    bpy.app.timers.register(_watch_timer, first_interval=WATCH_MIN_INTERVAL, persistent=True)
 
 def unregister():
     global _icons
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    for handler in (_refresh_icons_on_load, _subscribe_on_load):
+        if handler in bpy.app.handlers.load_post:
+            bpy.app.handlers.load_post.remove(handler)
+    if bpy.app.timers.is_registered(_refresh_icons_timer):
+        bpy.app.timers.unregister(_refresh_icons_timer)
+    if bpy.app.timers.is_registered(_watch_timer):
+        bpy.app.timers.unregister(_watch_timer)
+    for handler in (_mark_unsynced, _load_library_on_load):
+        if handler in bpy.app.handlers.load_post:
+            bpy.app.handlers.load_post.remove(handler)
+    if bpy.app.timers.is_registered(_load_library_timer):
+        bpy.app.timers.unregister(_load_library_timer)
+    _restore_plans.clear()
+    _default_fixups.clear()
+    _parsed_parameters.clear()
+    _capture_schemas.clear()
+    _icon_values.clear()
+    _icon_index.clear()
+    _icon_search_cache.clear()
+    _button_search_cache.clear()
+    _button_tag_items.clear()
+    _preset_usage.clear()
+    _bank_items.clear()
+    if _flush_on_load in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.remove(_flush_on_load)
     bpy.utils.previews.remove(_icons)
\ No newline at end of file